@@ -1,6 +1,16 @@
 from .core.states import StateProtocol, SharedProtocol
+from .core.history import DiscordHistoryCache, ChannelHistory
+from .core.attachments import AttachmentStore
+from .core.edit_scheduler import MessageEditScheduler
+from .core.text_pages import TextPages
 
 __all__ = [
     "StateProtocol",
     "SharedProtocol",
+
+    "DiscordHistoryCache",
+    "ChannelHistory",
+    "AttachmentStore",
+    "MessageEditScheduler",
+    "TextPages",
 ]
\ No newline at end of file
@@ -0,0 +1,230 @@
+from collections import OrderedDict
+from pathlib import Path
+import discord
+import asyncio
+import hashlib
+import os
+import tempfile
+
+
+class AttachmentStore:
+    """Process-wide content-addressed store for the bytes of Discord attachments.
+
+    Attachments are downloaded only once and indexed by their attachment id and the SHA-256 hash of their content,
+    so identical files are stored once and all chunks share the same bytes object.
+
+    The store has two tiers:
+    - A LRU memory tier limited to `max_memory_bytes`.
+    - A disk tier in `directory` limited to `max_disk_bytes`. Entries evicted from memory are spilled to disk. The disk is read, written and cleaned up in worker threads.
+
+    Attachments larger than `max_attachment_bytes` are not downloaded at all.
+
+    Attributes:
+        max_attachment_bytes: The maximum size of a single attachment.
+        max_memory_bytes: The maximum size of the memory tier.
+        max_disk_bytes: The maximum size of the disk tier.
+        max_ids: The maximum number of attachment ids in the index.
+        directory: The directory of the disk tier. `None` disables the disk tier.
+    """
+
+    max_attachment_bytes: int = 25 * 1024 * 1024
+    max_memory_bytes: int = 64 * 1024 * 1024
+    max_disk_bytes: int = 1024 * 1024 * 1024
+    max_ids: int = 10000
+    directory: Path | None = Path(tempfile.gettempdir()) / "edgynodes-attachments"
+
+    _ids: OrderedDict[int, str] = OrderedDict() # attachment id -> digest
+    _memory: OrderedDict[str, bytes] = OrderedDict() # digest -> bytes
+    _memory_bytes: int = 0
+    _disk: OrderedDict[str, int] = OrderedDict() # digest -> size
+    _disk_bytes: int = 0
+    _pending: dict[int, asyncio.Task[bytes]] = {} # attachment id -> download
+
+
+    @classmethod
+    def is_too_large(cls, attachment: discord.Attachment) -> bool:
+        return attachment.size > cls.max_attachment_bytes
+
+
+    @classmethod
+    async def read(cls, attachment: discord.Attachment) -> bytes | None:
+        """Get the bytes of the attachment and download it only if it is not stored yet.
+
+        Concurrent reads of the same attachment share one download.
+
+        Returns:
+            The bytes of the attachment or `None` if the attachment is larger than `max_attachment_bytes`.
+
+        Raises:
+            OSError: If entries evicted from memory can not be written to the disk tier. The error reaches the calling node.
+        """
+
+        if cls.is_too_large(attachment):
+            return None
+
+        if (digest := cls._ids.get(attachment.id)) is not None:
+            cls._ids.move_to_end(attachment.id)
+
+            if (data := await cls.get(digest)) is not None:
+                return data
+
+        if (task := cls._pending.get(attachment.id)) is None or task.get_loop() is not asyncio.get_running_loop():
+            task = cls._pending[attachment.id] = asyncio.create_task(cls._download(attachment))
+
+        return await asyncio.shield(task)
+
+
+    @classmethod
+    async def get(cls, digest: str) -> bytes | None:
+
+        if (data := cls._memory.get(digest)) is not None:
+            cls._memory.move_to_end(digest)
+            return data
+
+        if digest not in cls._disk or cls.directory is None:
+            return None
+
+        try:
+            data = await asyncio.to_thread((cls.directory / digest).read_bytes)
+
+        except OSError:
+            await cls._forget_disk(digest)
+            return None
+
+        if digest in cls._disk:
+            cls._disk.move_to_end(digest)
+
+        await cls.put(digest, data)
+
+        return data
+
+
+    @classmethod
+    async def put(cls, digest: str, data: bytes) -> None:
+
+        if digest in cls._memory:
+            cls._memory.move_to_end(digest)
+            return
+
+        cls._memory[digest] = data
+        cls._memory_bytes += len(data)
+
+        evicted: list[tuple[str, bytes]] = []
+
+        while cls._memory_bytes > cls.max_memory_bytes and len(cls._memory) > 1:
+            evicted_digest, evicted_data = cls._memory.popitem(last=False)
+            cls._memory_bytes -= len(evicted_data)
+            evicted.append((evicted_digest, evicted_data))
+
+        await cls._spill(evicted)
+
+
+    @classmethod
+    async def clear(cls) -> None:
+
+        await cls._forget_disk(*cls._disk)
+
+        cls._ids.clear()
+        cls._memory.clear()
+        cls._memory_bytes = 0
+
+
+    @classmethod
+    async def _download(cls, attachment: discord.Attachment) -> bytes:
+
+        try:
+            data = await attachment.read()
+            digest = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+
+        finally:
+            if cls._pending.get(attachment.id) is asyncio.current_task():
+                del cls._pending[attachment.id]
+
+        cls._ids[attachment.id] = digest
+        cls._ids.move_to_end(attachment.id)
+
+        while len(cls._ids) > cls.max_ids:
+            cls._ids.popitem(last=False)
+
+        # Share the stored object if the same content is already known
+        if (stored := await cls.get(digest)) is not None:
+            return stored
+
+        await cls.put(digest, data)
+
+        return data
+
+
+    @classmethod
+    async def _spill(cls, entries: list[tuple[str, bytes]]) -> None:
+        """Write entries evicted from memory to the disk tier in a worker thread and delete the oldest files above `max_disk_bytes`.
+
+        Raises the `OSError` of a failed write after the index is updated with the written entries.
+        """
+
+        directory = cls.directory
+        entries = [(digest, data) for digest, data in entries if digest not in cls._disk and len(data) <= cls.max_disk_bytes]
+
+        if directory is None or not entries:
+            return
+
+        written: list[tuple[str, int]] = []
+
+        def write() -> None:
+
+            for digest, data in entries:
+                path = directory / digest
+                tmp_path = path.with_suffix(".tmp")
+
+                try:
+                    directory.mkdir(parents=True, exist_ok=True)
+                    tmp_path.write_bytes(data)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    e.add_note(f"Unable to spill attachment {digest} to disk")
+                    raise e
+
+                written.append((digest, len(data)))
+
+        try:
+            await asyncio.to_thread(write)
+
+        finally:
+            for digest, size in written:
+                if digest not in cls._disk:
+                    cls._disk[digest] = size
+                    cls._disk_bytes += size
+
+            overflow: list[str] = []
+            remaining = cls._disk_bytes
+
+            for digest, size in cls._disk.items():
+                if remaining <= cls.max_disk_bytes:
+                    break
+                overflow.append(digest)
+                remaining -= size
+
+            await cls._forget_disk(*overflow)
+
+
+    @classmethod
+    async def _forget_disk(cls, *digests: str) -> None:
+        """Remove the entries from the index and delete their files in a worker thread."""
+
+        removed: list[str] = []
+
+        for digest in digests:
+            if (size := cls._disk.pop(digest, None)) is not None:
+                cls._disk_bytes -= size
+                removed.append(digest)
+
+        directory = cls.directory
+
+        if directory is None or not removed:
+            return
+
+        def unlink() -> None:
+            for digest in removed:
+                (directory / digest).unlink(missing_ok=True)
+
+        await asyncio.to_thread(unlink)
@@ -0,0 +1,137 @@
+from typing import Any, Awaitable, Callable
+import asyncio
+import time
+
+
+class MessageEditScheduler[T]:
+    """Send the latest state of a streamed Discord message in the background.
+
+    `update` only stores the latest value and returns immediately, so the consumer of a stream is never blocked by Discord.
+    A background task sends the latest value at most every `interval` seconds. Intermediate values are dropped.
+
+    The interval adapts to the rate limit of the channel:
+    py-cord waits inside the request when the rate limit bucket is exhausted, so a slow edit means the bucket is depleted.
+    Then the interval is doubled up to `max_interval`. After fast edits it decays back to `min_interval`.
+
+    A failed send is logged and retried with the latest value after a doubled interval, so a transient Discord error does not stop the edits.
+
+    Attributes:
+        send: The coroutine function that sends a value to Discord.
+        min_interval: The minimum interval in seconds between two sends.
+        max_interval: The maximum interval in seconds between two sends.
+        slow_send_threshold: The duration in seconds of a send that is considered rate limited.
+        interval: The current interval in seconds.
+    """
+
+    send: Callable[[T], Awaitable[Any]]
+    min_interval: float
+    max_interval: float
+    slow_send_threshold: float
+    interval: float
+
+    def __init__(self, send: Callable[[T], Awaitable[Any]], min_interval: float = 1.0, max_interval: float = 5.0, slow_send_threshold: float = 0.5) -> None:
+
+        self.send = send
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.slow_send_threshold = slow_send_threshold
+        self.interval = min_interval
+
+        self._latest: T | None = None
+        self._pending = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._error: Exception | None = None
+
+
+    def start(self) -> None:
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+
+    def update(self, value: T) -> None:
+        """Set the latest value to send. Never blocks."""
+
+        self._latest = value
+        self._pending.set()
+
+
+    async def close(self) -> None:
+        """Send the latest value if not sent yet and stop the background task.
+
+        Raises the error of the last send if it failed.
+        """
+
+        self._closing.set()
+
+        if self._task is None: # Never started
+            if self._pending.is_set():
+                await self._send_latest()
+            return
+
+        await self._task
+
+        if self._error is not None:
+            raise self._error
+
+
+    def cancel(self) -> None:
+
+        if self._task is not None:
+            self._task.cancel()
+            # Retrieve the result, so an unexpected error of the task is not reported as never retrieved
+            self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
+    async def _run(self) -> None:
+
+        while True:
+
+            pending = asyncio.create_task(self._pending.wait())
+            closing = asyncio.create_task(self._closing.wait())
+
+            await asyncio.wait([pending, closing], return_when=asyncio.FIRST_COMPLETED)
+
+            pending.cancel()
+            closing.cancel()
+
+            if not self._pending.is_set(): # Closed without pending value
+                return
+
+            try:
+                await self._send_latest()
+                self._error = None
+
+            except Exception as e:
+                print(f"Error sending message edit: {e!r}")
+                self._error = e
+                self.interval = min(self.max_interval, self.interval * 2)
+
+                if not self._closing.is_set(): # Retry the latest value after the interval
+                    self._pending.set()
+
+            if self._closing.is_set():
+                if self._pending.is_set(): # Updated during the last send
+                    continue
+                return
+
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=self.interval)
+            except TimeoutError:
+                pass
+
+
+    async def _send_latest(self) -> None:
+
+        self._pending.clear()
+        value: T = self._latest # type: ignore
+
+        start = time.monotonic()
+        await self.send(value)
+        duration = time.monotonic() - start
+
+        if duration >= self.slow_send_threshold:
+            self.interval = min(self.max_interval, self.interval * 2)
+        else:
+            self.interval = max(self.min_interval, self.interval * 0.75)
@@ -0,0 +1,259 @@
+from typing import Hashable
+import asyncio
+from llmir import AIMessage
+import discord
+from discord.ext import commands
+
+
+class ChannelHistory:
+    """The cached messages of one Discord channel.
+
+    Attributes:
+        messages: The known messages by id.
+        stale: The ids of edited messages that need to be fetched again.
+        loaded: Whether the history was loaded from the channel once. Only then new messages from gateway events are accepted.
+        exhausted: Whether the history contains the very first message of the channel.
+        lock: Serializes the loads of the channel.
+    """
+
+    messages: dict[int, discord.Message]
+    stale: set[int]
+    loaded: bool
+    exhausted: bool
+    lock: asyncio.Lock
+
+    def __init__(self) -> None:
+        self.messages = {}
+        self.stale = set()
+        self.loaded = False
+        self.exhausted = False
+        self.lock = asyncio.Lock()
+
+        self._converted: dict[int, tuple[Hashable, AIMessage]] = {}
+
+
+    @property
+    def last_id(self) -> int | None:
+        return max(self.messages) if self.messages else None
+
+    @property
+    def first_id(self) -> int | None:
+        return min(self.messages) if self.messages else None
+
+
+    def add(self, message: discord.Message) -> None:
+
+        if (previous := self.messages.get(message.id)) is not None and previous.edited_at != message.edited_at:
+            self._converted.pop(message.id, None)
+
+        self.messages[message.id] = message
+        self.stale.discard(message.id)
+
+
+    def remove(self, message_id: int) -> None:
+
+        self.messages.pop(message_id, None)
+        self.stale.discard(message_id)
+        self._converted.pop(message_id, None)
+
+
+    def invalidate(self, message_id: int) -> None:
+
+        if message_id in self.messages:
+            self.stale.add(message_id)
+            self._converted.pop(message_id, None)
+
+
+    def newest(self, limit: int) -> list[discord.Message]:
+        """Get the newest `limit` messages, newest first."""
+
+        return [self.messages[message_id] for message_id in sorted(self.messages, reverse=True)[:limit]]
+
+
+    def trim(self, max_messages: int) -> None:
+
+        if len(self.messages) <= max_messages:
+            return
+
+        for message_id in sorted(self.messages)[:len(self.messages) - max_messages]:
+            self.remove(message_id)
+
+        self.exhausted = False
+
+
+    def get_converted(self, message_id: int, key: Hashable) -> AIMessage | None:
+
+        entry = self._converted.get(message_id)
+
+        if entry is None or entry[0] != key:
+            return None
+
+        return entry[1].model_copy(deep=True)
+
+
+    def set_converted(self, message_id: int, key: Hashable, message: AIMessage) -> None:
+
+        if message_id in self.messages:
+            self._converted[message_id] = (key, message.model_copy(deep=True))
+
+
+    def clear(self) -> None:
+
+        self.messages.clear()
+        self.stale.clear()
+        self._converted.clear()
+        self.loaded = False
+        self.exhausted = False
+
+
+
+class DiscordHistoryCache:
+    """Process-wide cache of Discord channel histories.
+
+    The first load of a channel fetches its history, later loads only fetch the gap since the last known message.
+    The cache is only used after `register(bot)`, which keeps it up to date from gateway events (create, edit, delete).
+    Without it, edits and deletions would be missed, so `load` fetches the whole history every time.
+
+    Attributes:
+        max_messages: The maximum number of messages kept per channel.
+    """
+
+    _channels: dict[int, ChannelHistory] = {}
+    _bots: set[int] = set() # ids of the registered bots
+
+    max_messages: int = 200
+
+    @classmethod
+    def get(cls, channel_id: int) -> ChannelHistory:
+
+        if channel_id not in cls._channels:
+            cls._channels[channel_id] = ChannelHistory()
+
+        return cls._channels[channel_id]
+
+
+    @classmethod
+    async def load(cls, channel: discord.abc.Messageable, limit: int) -> list[discord.Message]:
+        """Get the newest `limit` messages of the channel, newest first.
+
+        Only messages that are not cached yet are fetched from Discord. If no bot is registered, all messages are fetched.
+        """
+
+        if not cls.is_registered():
+            return [message async for message in channel.history(limit=limit, oldest_first=False)]
+
+        history = cls.get(channel.id) # type: ignore
+
+        async with history.lock:
+            return await cls._load(history, channel, limit)
+
+
+    @classmethod
+    async def _load(cls, history: ChannelHistory, channel: discord.abc.Messageable, limit: int) -> list[discord.Message]:
+
+        if not history.loaded:
+            history.clear()
+
+            async for message in channel.history(limit=limit, oldest_first=False):
+                history.add(message)
+
+            history.loaded = True
+            history.exhausted = len(history.messages) < limit
+
+        else:
+            # Fetch the gap since the last known message
+            if (last_id := history.last_id) is not None:
+                # Oldest first makes py-cord page forward from the last known message instead of filtering the newest messages
+                gap = [message async for message in channel.history(limit=limit, after=discord.Object(id=last_id), oldest_first=True)]
+
+                if len(gap) >= limit: # The gap may be larger than the limit, so the cached messages are not contiguous anymore
+                    history.loaded = False
+                    return await cls._load(history, channel, limit)
+
+                for message in reversed(gap):
+                    history.add(message)
+
+            # Fetch edited messages again
+            for message_id in history.stale & set(sorted(history.messages, reverse=True)[:limit]):
+                try:
+                    history.add(await channel.fetch_message(message_id))
+                except discord.NotFound:
+                    history.remove(message_id)
+
+            # Fetch older messages if the limit was raised
+            missing = limit - len(history.messages)
+            if missing > 0 and not history.exhausted and (first_id := history.first_id) is not None:
+                fetched = 0
+                async for message in channel.history(limit=missing, before=discord.Object(id=first_id), oldest_first=False):
+                    history.add(message)
+                    fetched += 1
+
+                history.exhausted = fetched < missing
+
+        history.trim(max(cls.max_messages, limit))
+
+        return history.newest(limit)
+
+
+    @classmethod
+    def is_registered(cls) -> bool:
+        return bool(cls._bots)
+
+
+    @classmethod
+    def register(cls, bot: commands.Bot) -> None:
+        """Keep the cached histories up to date with the gateway events of the bot. Registering a bot again has no effect."""
+
+        if id(bot) in cls._bots:
+            return
+
+        cls._bots.add(id(bot))
+
+        bot.add_listener(cls.on_message, "on_message")
+        bot.add_listener(cls.on_raw_message_edit, "on_raw_message_edit")
+        bot.add_listener(cls.on_message_edit, "on_message_edit")
+        bot.add_listener(cls.on_raw_message_delete, "on_raw_message_delete")
+        bot.add_listener(cls.on_raw_bulk_message_delete, "on_raw_bulk_message_delete")
+
+
+    @classmethod
+    async def on_message(cls, message: discord.Message) -> None:
+
+        history = cls._channels.get(message.channel.id)
+
+        if history is not None and history.loaded:
+            history.add(message)
+
+
+    @classmethod
+    async def on_raw_message_edit(cls, payload: discord.RawMessageUpdateEvent) -> None:
+
+        history = cls._channels.get(payload.channel_id)
+
+        # The message is fetched again on the next load, unless `on_message_edit` provides the edited message
+        if history is not None:
+            history.invalidate(payload.message_id)
+
+
+    @classmethod
+    async def on_message_edit(cls, before: discord.Message, after: discord.Message) -> None:
+
+        history = cls._channels.get(after.channel.id)
+
+        if history is not None and after.id in history.messages:
+            history.add(after)
+
+
+    @classmethod
+    async def on_raw_message_delete(cls, payload: discord.RawMessageDeleteEvent) -> None:
+
+        if (history := cls._channels.get(payload.channel_id)) is not None:
+            history.remove(payload.message_id)
+
+
+    @classmethod
+    async def on_raw_bulk_message_delete(cls, payload: discord.RawBulkMessageDeleteEvent) -> None:
+
+        if (history := cls._channels.get(payload.channel_id)) is not None:
+            for message_id in payload.message_ids:
+                history.remove(message_id)
@@ -0,0 +1,90 @@
+from typing import Generator
+
+
+class TextPages:
+    """Append-only text that is split into pages of `page_size` characters.
+
+    Appending is amortized constant time per character, because only the unfinished last page (tail) is joined and split.
+    Finished pages are never copied again.
+
+    Attributes:
+        page_size: The maximum number of characters of a page.
+        pages: The finished pages.
+    """
+
+    page_size: int
+    pages: list[str]
+
+    def __init__(self, page_size: int = 2000) -> None:
+        self.page_size = page_size
+        self.pages = []
+
+        self._tail: list[str] = []
+        self._tail_length = 0
+        self._length = 0
+        self._has_content = False
+
+
+    def append(self, text: str) -> None:
+        """Append text and move full pages from the tail to `pages`."""
+
+        if not text:
+            return
+
+        self._tail.append(text)
+        self._tail_length += len(text)
+        self._length += len(text)
+
+        if not self._has_content and text.strip():
+            self._has_content = True
+
+        if self._tail_length >= self.page_size:
+            tail = "".join(self._tail)
+
+            while len(tail) >= self.page_size:
+                self.pages.append(tail[:self.page_size])
+                tail = tail[self.page_size:]
+
+            self._tail = [tail] if tail else []
+            self._tail_length = len(tail)
+
+
+    @property
+    def tail(self) -> str:
+        """The unfinished last page."""
+
+        if len(self._tail) > 1:
+            self._tail = ["".join(self._tail)]
+
+        return self._tail[0] if self._tail else ""
+
+
+    @property
+    def has_content(self) -> bool:
+        """Whether the text contains non-whitespace characters."""
+        return self._has_content
+
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages) + (1 if self._tail_length else 0)
+
+
+    def page(self, index: int) -> str:
+        return self.pages[index] if index < len(self.pages) else self.tail
+
+
+    def all(self) -> Generator[str]:
+        """Yield all pages including the tail."""
+
+        yield from self.pages
+
+        if self._tail_length:
+            yield self.tail
+
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return "".join(self.all())
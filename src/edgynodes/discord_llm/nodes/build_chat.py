@@ -1,17 +1,37 @@
 from edgygraph import Node
 from llmir import AIMessage, AIChunks, AIChunkText, AIChunkFile, AIChunkImageURL, AIRoles
+from typing import Callable
+from contextlib import nullcontext
+import asyncio
 import discord
+from discord.ext import commands
 import mimetypes
+import math
 
 from ..core.states import StateProtocol, SharedProtocol
+from ..core.history import DiscordHistoryCache
+from ..core.attachments import AttachmentStore
 
 class BuildChatNode(Node[StateProtocol, SharedProtocol]):
     """Add the last `limit` messages in the discord channel to the messages in the state.
 
+    The converted messages are cached per channel in the `DiscordHistoryCache`,
+    so only new or edited messages are fetched and converted again.
+    The cache is registered to the gateway events of the bot on first use, so edits and deletions are applied.
+    Attachments are loaded through the `AttachmentStore` and skipped if they are too large.
+    The messages are converted and their attachments downloaded concurrently, the order of the history is kept.
+
+    With `max_tokens` the history is trimmed from the oldest message to fit into the token budget.
+    The newest message is always included.
+
     Attributes:
-        limit: The number of messages to load from the discord channel.
+        limit: The maximum number of messages to load from the discord channel.
         include_embeds: Whether to transfer embeds to the messages.
         include_attachments: Whether to transfer attachments to the messages.
+        use_cache: Whether to use the `DiscordHistoryCache`.
+        max_tokens: The token budget of the history. `None` means no budget.
+        count_tokens: A function to count the tokens of a message. Defaults to `estimate_tokens`.
+        max_concurrent_downloads: The maximum number of attachments downloaded at the same time.
     """
 
     dependencies = {"llmir", "py-cord"}
@@ -19,61 +39,146 @@ class BuildChatNode(Node[StateProtocol, SharedProtocol]):
     limit: int
     include_embeds: bool
     include_attachments: bool
+    use_cache: bool
+    max_tokens: int | None
+    count_tokens: Callable[[AIMessage], int]
+    max_concurrent_downloads: int
 
-    def __init__(self, limit: int = 20, include_embeds: bool = True, include_attachments: bool = True) -> None:
+    def __init__(self, limit: int = 20, include_embeds: bool = True, include_attachments: bool = True, use_cache: bool = True, max_tokens: int | None = None, count_tokens: Callable[[AIMessage], int] | None = None, max_concurrent_downloads: int = 4) -> None:
         super().__init__()
 
         self.limit = limit
         self.include_embeds = include_embeds
         self.include_attachments = include_attachments
+        self.use_cache = use_cache
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or self.estimate_tokens
+        self.max_concurrent_downloads = max_concurrent_downloads
 
 
     async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
 
         chat: list[AIMessage] = []
+        tokens = 0
 
         async with shared.lock:
             channel = shared.discord.text_channel
             bot = shared.discord.bot
 
-        async for msg in channel.history(limit=self.limit, oldest_first=False):
+        if self.use_cache:
+            DiscordHistoryCache.register(bot)
+            messages = await DiscordHistoryCache.load(channel, self.limit)
+        else:
+            messages = [msg async for msg in channel.history(limit=self.limit, oldest_first=False)]
+
+        downloads = asyncio.Semaphore(self.max_concurrent_downloads)
+
+        ai_messages = await asyncio.gather(
+            *(self.convert_message(msg, bot, downloads) for msg in messages)
+        )
+
+        for ai_message in ai_messages:
+
+            if self.max_tokens is not None:
+                tokens += self.count_tokens(ai_message)
+
+                if tokens > self.max_tokens and chat:
+                    break
+
+            chat.append(ai_message)
+
+        chat.reverse()
+
+        state.llm.messages.extend(chat)
+
+
+    async def convert_message(self, msg: discord.Message, bot: commands.Bot, downloads: asyncio.Semaphore | None = None) -> AIMessage:
+        """Convert a discord message, using the cached conversion if available."""
+
+        if not self.use_cache:
+            return await self.format_message(msg, bot, downloads)
+
+        history = DiscordHistoryCache.get(msg.channel.id)
+        key = (msg.edited_at, bot.user.id if bot.user else None, self.include_embeds, self.include_attachments)
 
-            role = AIRoles.MODEL if msg.author == bot.user else AIRoles.USER
+        if (ai_message := history.get_converted(msg.id, key)) is None:
+            ai_message = await self.format_message(msg, bot, downloads)
+            history.set_converted(msg.id, key, ai_message)
 
-            chunks: list[AIChunks] = []
+        return ai_message
 
-            if msg.content:
-                chunks.append(AIChunkText(text=msg.content))
 
-            if msg.embeds and self.include_embeds:
-                for embed in msg.embeds:
+    async def format_message(self, msg: discord.Message, bot: commands.Bot, downloads: asyncio.Semaphore | None = None) -> AIMessage:
 
-                    if embed.description and embed.description.strip().startswith("```tool_call_"): #TODO Implement filters or something to keep a clean architecture instead of hardcoding this here
-                        # This is a tool call embed, we will handle it in the tool call response node, so we skip it here to avoid duplicates
-                        continue
+        role = AIRoles.MODEL if msg.author == bot.user else AIRoles.USER
 
-                    chunks.extend(self.format_embed(embed))
+        chunks: list[AIChunks] = []
+
+        if msg.content:
+            chunks.append(AIChunkText(text=msg.content))
 
-            if msg.attachments and self.include_attachments:
-                for attachment in msg.attachments:
+        if msg.embeds and self.include_embeds:
+            for embed in msg.embeds:
 
-                    mimetype, _ = mimetypes.guess_type(attachment.filename)
-                    file_bytes = await attachment.read()
+                if embed.description and embed.description.strip().startswith("```tool_call_"): #TODO Implement filters or something to keep a clean architecture instead of hardcoding this here
+                    # This is a tool call embed, we will handle it in the tool call response node, so we skip it here to avoid duplicates
+                    continue
 
-                    chunks.append(AIChunkFile(
-                        name=attachment.filename,
-                        mimetype=str(mimetype),
-                        bytes=file_bytes,
-                    ))
+                chunks.extend(self.format_embed(embed))
 
-            chat.append(AIMessage(
-                role=role,
-                chunks=chunks,
+        if msg.attachments and self.include_attachments:
+            chunks.extend(await asyncio.gather(
+                *(self.format_attachment(attachment, downloads) for attachment in msg.attachments)
             ))
 
-        chat.reverse()
+        return AIMessage(
+            role=role,
+            chunks=chunks,
+        )
 
-        state.llm.messages.extend(chat)
+
+    async def format_attachment(self, attachment: discord.Attachment, downloads: asyncio.Semaphore | None = None) -> AIChunks:
+
+        mimetype, _ = mimetypes.guess_type(attachment.filename)
+
+        async with downloads or nullcontext():
+            file_bytes = await AttachmentStore.read(attachment)
+
+        if file_bytes is None:
+            return AIChunkText(text=f"[Attachment too large: {attachment.filename}, size: {attachment.size} bytes]")
+
+        return AIChunkFile(
+            name=attachment.filename,
+            mimetype=str(mimetype),
+            bytes=file_bytes,
+        )
+
+
+    @classmethod
+    def estimate_tokens(cls, message: AIMessage, chars_per_token: int = 4, tokens_per_file: int = 1000) -> int:
+        """Roughly estimate the number of tokens of a message.
+
+        Args:
+            message: The message to estimate.
+            chars_per_token: The average number of characters per token.
+            tokens_per_file: The assumed number of tokens of a file or image.
+
+        Returns:
+            The estimated number of tokens.
+        """
+
+        tokens = 4 # Message overhead
+
+        for chunk in message.chunks:
+            match chunk:
+                case AIChunkText():
+                    tokens += math.ceil(len(chunk.text) / chars_per_token)
+                case AIChunkFile() | AIChunkImageURL():
+                    tokens += tokens_per_file
+                case _:
+                    tokens += math.ceil(len(str(chunk)) / chars_per_token)
+
+        return tokens
 
 
     def format_embed(self, embed: discord.Embed) -> list[AIChunks]:
@@ -1,8 +1,10 @@
 from .nodes.content import BuildDiscordContentNode
 from .nodes.embed import BuildDiscordEmbedNode
 from .nodes.attachments import BuildDiscordAttachmentsNode
+from .build_chat import BuildChatNode
 
 __all__ = [
+    "BuildChatNode",
     "BuildDiscordContentNode",
     "BuildDiscordEmbedNode",
     "BuildDiscordAttachmentsNode"
@@ -1,10 +1,15 @@
 from edgygraph import Node, Graph, State, Shared, END, START
+from collections.abc import Sequence
+import asyncio
 import discord
 from discord.ext import commands
 from llmir.messages import AIMessages
 
 from ...core.states import StateProtocol, SharedProtocol
 from .core.states import StateProtocol as BuildChatStateProtocol, SharedProtocol as BuildChatSharedProtocol
+from .nodes.content import BuildDiscordContentNode
+from .nodes.embed import BuildDiscordEmbedNode
+from .nodes.attachments import BuildDiscordAttachmentsNode
 
 
 class BuildChatState(State):
@@ -18,10 +23,18 @@ class BuildChatShared(Shared):
 class BuildChatNode(Node[StateProtocol, SharedProtocol]):
     """Add the last `limit` messages in the discord channel to the messages in the state.
 
+    Each message is converted by running the `nodes` as a sub-graph.
+    The sub-graphs of the messages run concurrently, the results are added in chronological order.
+
+    The sub-graph is compiled once per concurrency slot on initialization and reused for every message,
+    because a graph instance can only run once at a time.
+
     Attributes:
         limit: The number of messages to load from the discord channel.
-        include_embeds: Whether to transfer embeds to the messages.
-        include_attachments: Whether to transfer attachments to the messages.
+        include_embeds: Whether to transfer embeds to the messages. Only used for the default nodes.
+        include_attachments: Whether to transfer attachments to the messages. Only used for the default nodes.
+        nodes: The nodes of the sub-graph, run in sequence for each message.
+        max_concurrency: The maximum number of messages converted at the same time.
     """
 
     dependencies = {"llmir", "py-cord"}
@@ -30,34 +43,69 @@ class BuildChatNode(Node[StateProtocol, SharedProtocol]):
     nodes: tuple[Node[BuildChatStateProtocol, BuildChatSharedProtocol], ...]
     include_embeds: bool
     include_attachments: bool
+    max_concurrency: int
 
-    def __init__(self, limit: int = 20, include_embeds: bool = True, include_attachments: bool = True) -> None:
+    def __init__(self, limit: int = 20, include_embeds: bool = True, include_attachments: bool = True, nodes: Sequence[Node[BuildChatStateProtocol, BuildChatSharedProtocol]] | None = None, max_concurrency: int = 4) -> None:
         super().__init__()
 
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
         self.limit = limit
         self.include_embeds = include_embeds
         self.include_attachments = include_attachments
+        self.max_concurrency = max_concurrency
 
+        if nodes is None:
+            nodes = [BuildDiscordContentNode()]
+            if include_embeds:
+                nodes.append(BuildDiscordEmbedNode())
+            if include_attachments:
+                nodes.append(BuildDiscordAttachmentsNode())
 
-    async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
+        self.nodes = tuple(nodes)
 
-        chat: list[AIMessages] = []
+        self._graphs: asyncio.Queue[Graph[BuildChatStateProtocol, BuildChatSharedProtocol]] = asyncio.Queue()
+        for _ in range(max_concurrency):
+            self._graphs.put_nowait(
+                Graph[BuildChatStateProtocol, BuildChatSharedProtocol](
+                    edges=[(START,*self.nodes,END,)]
+                )
+            )
+
+
+    async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
 
         async with shared.lock:
             channel = shared.discord.text_channel
             bot = shared.discord.bot
 
-        graph = Graph[BuildChatStateProtocol, BuildChatSharedProtocol](
-            edges=[(START,*self.nodes,END,)]
+        messages = [msg async for msg in channel.history(limit=self.limit, oldest_first=False)]
+
+        results = await asyncio.gather(
+            *(self.build_message(msg, bot) for msg in messages)
         )
 
-        async for msg in channel.history(limit=self.limit, oldest_first=False):
-            
+        chat: list[AIMessages] = []
+
+        for ai_messages in reversed(results): # History is newest first
+            chat.extend(ai_messages)
+
+        state.llm.messages.extend(chat)
+
+
+    async def build_message(self, msg: discord.Message, bot: commands.Bot) -> list[AIMessages]:
+        """Run the sub-graph for one message on a free graph instance."""
+
+        graph = await self._graphs.get()
+
+        try:
             build_state = BuildChatState(ai_messages=[])
             build_shared = BuildChatShared(discord_message=msg, discord_bot=bot)
 
             build_state, build_shared = await graph(build_state, build_shared)
 
-            chat.extend(build_state.ai_messages)
-
+            return build_state.ai_messages
 
+        finally:
+            self._graphs.put_nowait(graph)
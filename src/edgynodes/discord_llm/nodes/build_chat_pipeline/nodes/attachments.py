@@ -1,16 +1,20 @@
 import edgygraph
 import mimetypes
-from llmir import AIChunkFile
+from llmir import AIChunkFile, AIChunkText
 from llmir.chunks import AIChunks
 from llmir.messages import AIMessage
 from llmir.messages import AIMessage
 from llmir.roles import AIRoles
 
 from ..core.states import StateProtocol, SharedProtocol
+from ....core.attachments import AttachmentStore
 
 class BuildDiscordAttachmentsNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedProtocol](edgygraph.Node[T, S]):
 
-    """Build file chunks from the attachments of a message."""
+    """Build file chunks from the attachments of a message.
+
+    The attachments are loaded through the `AttachmentStore` and skipped if they are too large.
+    """
 
     required_packages = {"py-cord", "llmir", "mimetypes"}
 
@@ -25,7 +29,11 @@ class BuildDiscordAttachmentsNode[T: StateProtocol = StateProtocol, S: SharedPro
 
         for attachment in message.attachments:
             mimetype, _ = mimetypes.guess_type(attachment.filename)
-            file_bytes = await attachment.read()
+            file_bytes = await AttachmentStore.read(attachment)
+
+            if file_bytes is None:
+                ai_chunks.append(AIChunkText(text=f"[Attachment too large: {attachment.filename}, size: {attachment.size} bytes]"))
+                continue
 
             ai_chunks.append(AIChunkFile(
                 name=attachment.filename,
@@ -5,9 +5,10 @@ from llmir import AIMessage, AIMessages, AIChunks, AIChunkText, AIChunkFile, AIC
 from typing import Literal, Generator, Callable
 import discord
 import io
-import time
 
 from ..core.states import StateProtocol, SharedProtocol
+from ..core.edit_scheduler import MessageEditScheduler
+from ..core.text_pages import TextPages
 
 
 
@@ -26,21 +27,24 @@ class RespondNode(Node[StateProtocol, SharedProtocol]):
             - `True`: Send all tool responses.
             - `False`: Do not send any tool responses.
             - `"only_media"`: Only send **non text chunks** in tool responses.
-        stream_text_edit_interval: The interval in seconds to update the streamed message in the Discord channel.
+        stream_text_edit_interval: The minimum interval in seconds to update the streamed message in the Discord channel.
+        stream_text_max_edit_interval: The maximum interval in seconds to update the streamed message, used when the channel is rate limited.
     """
 
     dependencies = {"llmir", "py-cord"}
 
     send_tool_responses: Literal[True, False, "only_media"]
     stream_text_edit_interval: float
+    stream_text_max_edit_interval: float
     filter: Callable[[AIMessages, AIChunks], bool]
 
 
-    def __init__(self, filter: Callable[[AIMessages, AIChunks], bool] | None = None, send_tool_responses: Literal[True, False, "only_media"] = "only_media", stream_text_edit_interval: float = 1.0, send_last_error: bool = True) -> None: # TODO filter with return
+    def __init__(self, filter: Callable[[AIMessages, AIChunks], bool] | None = None, send_tool_responses: Literal[True, False, "only_media"] = "only_media", stream_text_edit_interval: float = 1.0, send_last_error: bool = True, stream_text_max_edit_interval: float = 5.0) -> None: # TODO filter with return
         super().__init__()
 
         self.send_tool_responses = send_tool_responses
         self.stream_text_edit_interval = stream_text_edit_interval
+        self.stream_text_max_edit_interval = stream_text_max_edit_interval
         self.filter = filter if filter is not None else lambda _, __: True
         self.send_last_error = send_last_error
 
@@ -80,7 +84,7 @@ class RespondNode(Node[StateProtocol, SharedProtocol]):
                 return self.filter(AIMessage(role=AIRoles.MODEL, chunks=[chunk]), chunk)
 
 
-            streamed_chunks = await self.stream_response(stream, channel, chunk_filter, self.stream_text_edit_interval)
+            streamed_chunks = await self.stream_response(stream, channel, chunk_filter, self.stream_text_edit_interval, self.stream_text_max_edit_interval)
 
             state.llm.new_messages.append(
                 AIMessage(
@@ -100,17 +104,22 @@ class RespondNode(Node[StateProtocol, SharedProtocol]):
 
 
     @classmethod
-    async def stream_response(cls, stream: Stream[AIChunks], channel: Messageable, filter: Callable[[AIChunks], bool], edit_interval: float) -> list[AIChunks]:
+    async def stream_response(cls, stream: Stream[AIChunks], channel: Messageable, filter: Callable[[AIChunks], bool], edit_interval: float, max_edit_interval: float | None = None) -> list[AIChunks]:
         """Stream the response from the LLM to the Discord channel.
         
         This method handles all AI chunk types.
         It sends text chunks as one text message that is edited incrementally. 
         The text message is only split at the maximum discord message length.
 
+        The edits are sent by a `MessageEditScheduler` in the background, so reading the stream is never slowed down by Discord.
+        Only the latest text is sent, intermediate states are dropped.
+        The text is collected in `TextPages`, so each edit only touches the last page, independent of the length of the answer.
+
         Args:
             stream: The stream of AI chunks to be processed.
             channel: The Discord channel where the response will be sent.
-            edit_interval: The interval in seconds at which the text message is edited.
+            edit_interval: The minimum interval in seconds at which the text message is edited.
+            max_edit_interval: The maximum interval in seconds at which the text message is edited when rate limited. Defaults to 5 times `edit_interval`.
 
         Returns:
             A list of all chunks that were streamed.
@@ -118,33 +127,44 @@ class RespondNode(Node[StateProtocol, SharedProtocol]):
 
         chunks: list[AIChunks] = []
         text_messages: list[Message] = []
-        text: str = ""
-        last_edit: float = 0.0
+        text = TextPages(page_size=2000)
+
+        async def send_text(text: TextPages) -> None:
+            await cls.send_pages_incremental(text_messages, text, channel)
+
+        scheduler = MessageEditScheduler[TextPages](
+            send_text, 
+            min_interval=edit_interval, 
+            max_interval=max_edit_interval if max_edit_interval is not None else edit_interval * 5,
+        )
+        scheduler.start()
+
+        try:
+            async with stream:
 
-        async with stream:
+                async for chunk in stream:
 
-            last_edit = time.monotonic()
+                    if filter(chunk):
 
-            async for chunk in stream:
+                        if isinstance(chunk, AIChunkText):
 
-                if filter(chunk):
+                            text.append(chunk.text)
 
-                    if isinstance(chunk, AIChunkText):
+                            if text.has_content:
+                                scheduler.update(text)
 
-                        text += chunk.text
-                        now = time.monotonic()
+                        else:
+                            await cls.send_chunk(chunk, channel)
+                            chunks.append(chunk)
 
-                        if now - last_edit >= edit_interval:
-                            text_messages = await cls.send_text_incremental(text_messages, text, channel)
-                            last_edit = now
+        except BaseException:
+            scheduler.cancel()
+            raise
 
-                    else:
-                        await cls.send_chunk(chunk, channel)
-                        chunks.append(chunk)
+        await scheduler.close()
 
-        if text.strip():
-            await cls.send_text_incremental(text_messages, text, channel)
-            for text_chunk in cls.chunk_string(text):
+        if text.has_content:
+            for text_chunk in text.all():
                 chunks.append(
                     AIChunkText(
                         text=text_chunk
@@ -195,6 +215,42 @@ class RespondNode(Node[StateProtocol, SharedProtocol]):
 
 
 
+    @classmethod
+    async def send_pages_incremental(cls, text_messages: list[Message], pages: TextPages, channel: Messageable) -> list[Message]:
+        """Send the pages to the Discord channel by editing the last Discord message and creating new ones if needed.
+
+        Like `send_text_incremental`, but without re-chunking the whole text.
+        Only the page of the last message and the new pages are accessed, so the cost does not grow with the length of the text.
+        The last message is not edited if its content did not change.
+
+        Args:
+            text_messages: The list of messages already sent for the pages. It is updated in place.
+            pages: The pages to send.
+            channel: The Discord channel to send the pages to.
+
+        Returns:
+            The list of messages that were edited or created.
+        """
+
+        for index in range(max(len(text_messages) - 1, 0), pages.page_count):
+
+            page = pages.page(index)
+
+            if index == len(text_messages) - 1: # message is last message -> edit it
+
+                if text_messages[index].content != page:
+                    text_messages[index] = await text_messages[index].edit(content=page)
+
+            else: # out of bounds -> create new message
+
+                text_messages.append(
+                    await channel.send(content=page)
+                )
+
+        return text_messages
+
+
+
     @classmethod
     async def send_chunk(cls, chunk: AIChunks, channel: Messageable) -> list[Message]:
         """Send an AI chunk to the Discord channel.
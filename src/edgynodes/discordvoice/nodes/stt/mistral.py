@@ -1,4 +1,5 @@
 from edgygraph import Node
+import asyncio
 from mistralai import Mistral
 import discord
 
@@ -6,6 +7,16 @@ from ...core.states import StateProtocol, SharedProtocol
 
 
 class STTMistralNode(Node[StateProtocol, SharedProtocol]):
+    """Transcribe the recorded audio of each user with the Mistral API.
+
+    The users are transcribed concurrently, at most `max_concurrency` requests at a time.
+    Audio shorter than `min_duration` seconds is skipped before the upload.
+    The transcriptions are stored ordered by user id, independent of which request finishes first.
+
+    Attributes:
+        max_concurrency: The maximum number of concurrent transcription requests.
+        min_duration: The minimum duration of audio in seconds to be transcribed.
+    """
 
     dependencies = {"mistralai", "py-cord"}
 
@@ -15,7 +26,17 @@ class STTMistralNode(Node[StateProtocol, SharedProtocol]):
 
     language: str | None
 
-    def __init__(self, api_key: str, model: str = "voxtral-mini-latest", language: str | None = None) -> None:
+    max_concurrency: int
+    min_duration: float
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "voxtral-mini-latest",
+        language: str | None = None,
+        max_concurrency: int = 4,
+        min_duration: float = 0.2,
+    ) -> None:
         super().__init__()
 
         self.model = model
@@ -23,6 +44,9 @@ class STTMistralNode(Node[StateProtocol, SharedProtocol]):
         
         self.language = language
 
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_duration = min_duration
+
 
     async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
 
@@ -35,32 +59,29 @@ class STTMistralNode(Node[StateProtocol, SharedProtocol]):
                 raise ValueError("No text channel found.")
             
 
-        for user_id, audio in sink.audio_data.items():
-            if not isinstance(audio, discord.sinks.AudioData):
-                raise ValueError("Audio data is not of type AudioData.")
+        wav_files = {
+            user_id: wav_bytes
+            for user_id, wav_bytes in sorted(self.collect_audio(sink).items(), key=lambda item: item[0])
+            if self.get_audio_duration(wav_bytes) >= self.min_duration
+        }
 
-            audio.file.seek(0)  # Wichtig, um den Stream zurückzusetzen
-            wav_bytes = audio.file.read()
-
-            # Sende an Mistral-API zur Transkription
-            transcription_response = await self.client.audio.transcriptions.complete_async(
-                model=self.model,
-                file={
-                    "content": wav_bytes,
-                    "file_name": f"{user_id}.{sink.encoding}",
-                },
-                language=self.language
-            )
-
-            # Ergebnis verarbeiten
-            transcription_text = transcription_response.text
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def transcribe(user_id: int, wav_bytes: bytes) -> str:
+            async with semaphore:
+                return await self.transcribe(user_id, wav_bytes, sink.encoding) # type: ignore
+
+        transcriptions = await asyncio.gather(*(transcribe(user_id, wav_bytes) for user_id, wav_bytes in wav_files.items()))
+
+        # Ergebnis verarbeiten
+        for user_id, transcription_text in zip(wav_files, transcriptions):
             print(f"Transkription für {user_id}: {transcription_text}")
 
             state.discordvoice.transcriptions[user_id] = transcription_text
 
             # Optional: Datei für Discord senden (falls gewünscht)
             # wav_file = discord.File(
-            #     fp=io.BytesIO(wav_bytes),
+            #     fp=io.BytesIO(wav_files[user_id]),
             #     filename=f"{user_id}.{sink.encoding}"
             # )
             # await text_channel.send(
@@ -69,6 +90,48 @@ class STTMistralNode(Node[StateProtocol, SharedProtocol]):
             # )
 
 
+    async def transcribe(self, user_id: int, wav_bytes: bytes, encoding: str = "wav") -> str:
+        """Transcribe the WAV audio of a user."""
+
+        # Sende an Mistral-API zur Transkription
+        transcription_response = await self.client.audio.transcriptions.complete_async(
+            model=self.model,
+            file={
+                "content": wav_bytes,
+                "file_name": f"{user_id}.{encoding}",
+            },
+            language=self.language
+        )
+
+        return transcription_response.text
+
+
+    @classmethod
+    def collect_audio(cls, sink: discord.sinks.Sink) -> dict[int, bytes]:
+        """Get the recorded audio of each user as WAV.
+
+        Sinks with `pop_utterances`, like the `VADWaveSink`, return their pending utterances, which frees their memory.
+        Other sinks return their `audio_data`.
+        """
+
+        if hasattr(sink, "pop_utterances"):
+            return {
+                user_id: sink.to_wav(b"".join(utterances))
+                for user_id, utterances in sink.pop_utterances().items()
+            } # type: ignore
+
+        wav_files: dict[int, bytes] = {}
+
+        for user_id, audio in sink.audio_data.items():
+            if not isinstance(audio, discord.sinks.AudioData):
+                raise ValueError("Audio data is not of type AudioData.")
+
+            audio.file.seek(0)  # Wichtig, um den Stream zurückzusetzen
+            wav_files[user_id] = audio.file.read()
+
+        return wav_files
+
+
     @classmethod
     def get_audio_duration(cls, wav_bytes: bytes, sample_rate: int = 48000, channels: int = 2, bytes_per_sample: int = 2) -> float:
         """Berechnet die Dauer einer WAV-Datei in Sekunden"""
@@ -1,11 +1,16 @@
 from .core import AwaitVoiceStopVADNode, AwaitVoiceStartVADNode
 from .utils.vad_wave_sink import VADWaveSink
+from .utils.voice_activity import VoiceActivityDetector, UserVoiceActivity
+from .utils.utterances import UtteranceBuffer
 
 __all__ = [
 
     "AwaitVoiceStopVADNode",
     "AwaitVoiceStartVADNode",
 
-    "VADWaveSink"
+    "VADWaveSink",
+    "VoiceActivityDetector",
+    "UserVoiceActivity",
+    "UtteranceBuffer",
 
 ]
\ No newline at end of file
@@ -10,7 +10,7 @@ from .utils.vad_wave_sink import VADWaveSink
 
 class AwaitVoiceStartVADNode(Node[StateProtocol, SharedProtocol]):
 
-    dependencies = {"py-cord", "webrtcvad", "setuptools"}
+    dependencies = {"py-cord", "webrtcvad", "setuptools", "numpy"}
 
     async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
 
@@ -51,6 +51,15 @@ class AwaitVoiceStartVADNode(Node[StateProtocol, SharedProtocol]):
 
 
 class AwaitVoiceStopVADNode(Node[StateProtocol, SharedProtocol]):
+    """Wait until no user spoke for `silence_timeout` seconds or the recording finished.
+
+    The node sleeps until the silence timeout after the last voice expires and only then checks again, instead of polling.
+
+    Attributes:
+        silence_timeout: The duration of silence in seconds that ends the turn.
+    """
+
+    silence_timeout: float
 
     def __init__(self, silence_timeout: float = 1) -> None:
 
@@ -61,6 +70,7 @@ class AwaitVoiceStopVADNode(Node[StateProtocol, SharedProtocol]):
         async with shared.lock:
             voice_client = shared.discordvoice.client
             sink = shared.discordvoice.sink
+            recording_finished = shared.discordvoice.recording_finished
 
         if not voice_client:
             raise Exception("Need to be in a voice channel.")
@@ -73,15 +83,24 @@ class AwaitVoiceStopVADNode(Node[StateProtocol, SharedProtocol]):
         
         start = time.monotonic()
 
-        await self.monitor_silence(voice_client, sink)
+        await self.monitor_silence(voice_client, sink, recording_finished)
 
         print(f"[yellow]Waited for silence for {time.monotonic() - start:.2f}s.[/yellow]")
 
     
-    async def monitor_silence(self, voice_client: discord.VoiceClient, sink: VADWaveSink):
+    async def monitor_silence(self, voice_client: discord.VoiceClient, sink: VADWaveSink, recording_finished: asyncio.Event | None = None):
+
+        recording_finished = recording_finished or asyncio.Event()
+
+        while voice_client.recording and not recording_finished.is_set():
+
+            # The deadline only moves later while someone speaks, so wake up at the current deadline and check again
+            remaining = self.silence_timeout - (time.monotonic() - sink.last_voice)
 
-        while voice_client.recording:
-            if time.monotonic() - sink.last_voice > self.silence_timeout:
+            if remaining <= 0:
                 break
 
-            await asyncio.sleep(0.1)
\ No newline at end of file
+            try:
+                await asyncio.wait_for(recording_finished.wait(), timeout=remaining)
+            except TimeoutError:
+                pass
\ No newline at end of file
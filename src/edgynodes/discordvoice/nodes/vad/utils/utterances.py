@@ -0,0 +1,110 @@
+from collections import deque
+import io
+import wave
+
+
+class UtteranceBuffer:
+    """Bounded audio buffer of one user, split into utterances at the VAD boundaries.
+
+    While the user is silent, only the last `pre_roll_packets` packets are kept in a ring buffer.
+    When the user starts speaking, they become the start of the utterance, so the first syllable is not clipped.
+    An utterance ends when the user stops speaking or reaches `max_utterance_bytes`.
+    Completed utterances wait in a queue of at most `max_pending` utterances until they are popped.
+
+    Attributes:
+        pre_roll: The ring buffer of the last silent packets.
+        current: The utterance in progress, `None` while silent.
+        completed: The completed utterances that were not popped yet.
+        max_utterance_bytes: The maximum size of an utterance.
+        dropped: The number of utterances dropped because the queue was full.
+    """
+
+    pre_roll: deque[bytes]
+    current: bytearray | None
+    completed: deque[bytes]
+    max_utterance_bytes: int
+    dropped: int
+
+    def __init__(self, pre_roll_packets: int, max_utterance_bytes: int, max_pending: int) -> None:
+        self.pre_roll = deque(maxlen=max(0, pre_roll_packets))
+        self.current = None
+        self.completed = deque()
+        self.max_utterance_bytes = max_utterance_bytes
+        self.max_pending = max(1, max_pending)
+        self.dropped = 0
+
+        self._has_speech = False
+
+
+    def write(self, data: bytes, speaking: bool) -> None:
+        """Add a packet. `speaking` is the smoothed voice activity after the packet."""
+
+        if self.current is None:
+            if not speaking:
+                self.pre_roll.append(data)
+                return
+
+            self.start()
+
+        self.current += data # type: ignore
+        self._has_speech = self._has_speech or speaking
+
+        if (not speaking and self._has_speech) or len(self.current) >= self.max_utterance_bytes: # type: ignore
+            self.finish()
+
+
+    def start(self) -> None:
+        """Start an utterance with the pre-roll. It ends at the first silence after speech."""
+
+        if self.current is None:
+            self.current = bytearray().join(self.pre_roll)
+            self.pre_roll.clear()
+            self._has_speech = False
+
+
+    def finish(self) -> None:
+        """Complete the utterance in progress."""
+
+        if self.current is None:
+            return
+
+        if len(self.completed) >= self.max_pending:
+            self.completed.popleft()
+            self.dropped += 1
+            print(f"Dropped an utterance, {self.max_pending} utterances are pending")
+
+        self.completed.append(bytes(self.current))
+        self.current = None
+
+
+    def pop(self, include_current: bool = False) -> list[bytes]:
+        """Remove and return the completed utterances, and the utterance in progress if `include_current` is set."""
+
+        if include_current:
+            self.finish()
+
+        utterances = list(self.completed)
+        self.completed.clear()
+
+        return utterances
+
+
+    @property
+    def size(self) -> int:
+        """The number of buffered bytes."""
+
+        return sum(map(len, self.pre_roll)) + len(self.current or b"") + sum(map(len, self.completed))
+
+
+    @classmethod
+    def to_wav(cls, pcm: bytes, sample_rate: int = 48000, channels: int = 2, bytes_per_sample: int = 2) -> bytes:
+
+        buffer = io.BytesIO()
+
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(channels)
+            wav_file.setsampwidth(bytes_per_sample)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(pcm)
+
+        return buffer.getvalue()
@@ -1,43 +1,153 @@
-import webrtcvad # type: ignore
 import discord
 import time
 import asyncio
-from typing import Literal
+import threading
+from typing import Any, Callable, Hashable, Literal
+
+from .voice_activity import VoiceActivityDetector
+from .utterances import UtteranceBuffer
 
 class VADWaveSink(discord.sinks.WaveSink):
+    """A `WaveSink` that detects the voice activity of each user.
+
+    The audio is not kept for the whole recording. Each user has an `UtteranceBuffer` that keeps a pre-roll of `pre_roll` seconds
+    while the user is silent and splits the speech into utterances at the VAD boundaries.
+    Get the utterances with `pop_utterances`, which releases their memory, so the memory stays bounded in long sessions.
+    If `dump_initial_silence` is disabled, the audio before the first speech of a user starts the first utterance.
+
+    `write` runs in the voice receive thread, so the events are set on the event loop with `call_soon_threadsafe`.
+
+    Attributes:
+        detector: The voice activity per user.
+        utterances: The audio buffer per user.
+        received_voice: Set when any user started speaking.
+        speaking: Set while the user is speaking, by user.
+        loop: The event loop of the events. Taken from the voice client on `init`.
+    """
 
     FRAME_MS = 20
     SAMPLE_RATE = 48000
     BYTES_PER_SAMPLE = 2
 
+    detector: VoiceActivityDetector
+    utterances: dict[Hashable, UtteranceBuffer]
     received_voice: asyncio.Event
+    speaking: dict[Hashable, asyncio.Event]
+    loop: asyncio.AbstractEventLoop | None
 
 
-    def __init__(self, vad_mode: Literal[0, 1, 2, 3] = 2, dump_initial_silence: bool = True):
+    def __init__(
+        self,
+        vad_mode: Literal[0, 1, 2, 3] = 2,
+        dump_initial_silence: bool = True,
+        start_frames: int = 2,
+        hangover_frames: int = 15,
+        pre_roll: float = 0.3,
+        max_utterance_seconds: float = 60,
+        max_pending_utterances: int = 8,
+    ):
         super().__init__() # type: ignore
 
-        self.vad = webrtcvad.Vad(vad_mode)  # 0–3 (3 = aggressiv)
-        self.last_voice = time.monotonic()
+        self.detector = VoiceActivityDetector(vad_mode, start_frames=start_frames, hangover_frames=hangover_frames)
         self.dump_initial_silence = dump_initial_silence
-        
+        self.pre_roll = pre_roll
+        self.max_utterance_seconds = max_utterance_seconds
+        self.max_pending_utterances = max_pending_utterances
+        self.utterances = {}
+        self._lock = threading.Lock()
+        self.created = time.monotonic()
+
         self.received_voice = asyncio.Event()
-        self.frame_size = int(
-            self.SAMPLE_RATE * self.FRAME_MS / 1000
-        ) * self.BYTES_PER_SAMPLE
+        self.speaking = {}
+
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+
+
+    def init(self, vc: discord.VoiceClient): # type: ignore
+        self.loop = vc.loop
+        super().init(vc) # type: ignore
+
+
+    @property
+    def last_voice(self) -> float:
+        """The time of the last voice of any user, or the creation time of the sink."""
+
+        with self._lock: # The receive thread adds users
+            last_voice = self.detector.last_voice
+        return last_voice if last_voice is not None else self.created
 
 
     def write(self, data: bytes, user: discord.abc.User):
 
-        for i in range(0, len(data), self.frame_size):
-            frame = data[i:i+self.frame_size]
-            if len(frame) < self.frame_size:
-                continue
-
-            if self.vad.is_speech(frame, self.SAMPLE_RATE): # type: ignore
-                self.received_voice.set()
-                self.last_voice = time.monotonic()
-        
-        
-        if self.received_voice.is_set():
-            
-            super().write(data, user) # type: ignore
+        with self._lock: # Add the user under the lock, `last_voice` iterates the users on the event loop
+            was_speaking = self.detector.get(user).speaking
+
+        activity = self.detector.process(data, user)
+
+        if activity.speaking != was_speaking:
+            self.call_threadsafe(self.set_speaking, user, activity.speaking)
+
+        with self._lock:
+            if user not in self.utterances:
+                self.utterances[user] = UtteranceBuffer(
+                    pre_roll_packets=round(self.pre_roll * 1000 / self.FRAME_MS),
+                    max_utterance_bytes=int(self.max_utterance_seconds * self.SAMPLE_RATE * self.BYTES_PER_SAMPLE * 2),
+                    max_pending=self.max_pending_utterances,
+                )
+
+                if not self.dump_initial_silence: # Record from the start
+                    self.utterances[user].start()
+
+            self.utterances[user].write(data, activity.speaking)
+
+
+    def pop_utterances(self, include_current: bool = True) -> dict[Hashable, list[bytes]]:
+        """Remove and return the recorded utterances as raw PCM by user.
+
+        Args:
+            include_current: Whether to also complete and return the utterances in progress.
+        """
+
+        with self._lock:
+            utterances = {user: buffer.pop(include_current) for user, buffer in self.utterances.items()}
+
+        return {user: pcm for user, pcm in utterances.items() if pcm}
+
+
+    def to_wav(self, pcm: bytes) -> bytes:
+        """Wrap raw PCM of this sink in a WAV container."""
+
+        return UtteranceBuffer.to_wav(pcm, self.SAMPLE_RATE, 2, self.BYTES_PER_SAMPLE)
+
+
+    def cleanup(self):
+
+        with self._lock:
+            for buffer in self.utterances.values():
+                buffer.finish()
+
+        super().cleanup() # type: ignore
+
+
+    def set_speaking(self, user: Hashable, speaking: bool) -> None:
+        """Update the events of the user. Runs on the event loop."""
+
+        if user not in self.speaking:
+            self.speaking[user] = asyncio.Event()
+
+        if speaking:
+            self.speaking[user].set()
+            self.received_voice.set()
+        else:
+            self.speaking[user].clear()
+
+
+    def call_threadsafe(self, callback: Callable[..., Any], *args: Any) -> None:
+
+        if self.loop is None or self.loop.is_closed():
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
@@ -0,0 +1,126 @@
+from typing import Hashable
+import time
+
+import numpy as np
+import webrtcvad # type: ignore
+
+
+class UserVoiceActivity:
+    """The voice activity of one user.
+
+    Attributes:
+        vad: The VAD instance of the user, it adapts to the audio of the user.
+        speaking: Whether the user is speaking, smoothed by the onset and hangover frames.
+        speech_start: The time the user started speaking for the first time, `None` before.
+        last_voice: The time of the last voiced frame while speaking, `None` before.
+        voiced_frames: The number of consecutive voiced frames.
+        silent_frames: The number of consecutive silent frames.
+    """
+
+    vad: webrtcvad.Vad
+    speaking: bool
+    speech_start: float | None
+    last_voice: float | None
+    voiced_frames: int
+    silent_frames: int
+
+    def __init__(self, vad: webrtcvad.Vad) -> None:
+        self.vad = vad
+        self.speaking = False
+        self.speech_start = None
+        self.last_voice = None
+        self.voiced_frames = 0
+        self.silent_frames = 0
+
+
+
+class VoiceActivityDetector:
+    """Detect the voice activity per user in Discord voice audio.
+
+    The 48 kHz stereo PCM of a packet is downmixed to mono with NumPy and split into 20 ms frames with a `memoryview`,
+    so the frames are passed to the VAD without copies.
+
+    A user starts speaking after `start_frames` consecutive voiced frames and stops after `hangover_frames` consecutive silent frames.
+    Short noise does not start speech and short pauses do not end it.
+
+    Attributes:
+        vad_mode: The aggressiveness of the VAD from 0 to 3.
+        start_frames: The number of consecutive voiced frames that start speech.
+        hangover_frames: The number of consecutive silent frames that end speech.
+        users: The voice activity by user.
+    """
+
+    FRAME_MS = 20
+    SAMPLE_RATE = 48000
+    CHANNELS = 2
+    BYTES_PER_SAMPLE = 2
+
+    vad_mode: int
+    start_frames: int
+    hangover_frames: int
+    users: dict[Hashable, UserVoiceActivity]
+
+    def __init__(self, vad_mode: int = 2, start_frames: int = 2, hangover_frames: int = 15) -> None:
+        self.vad_mode = vad_mode
+        self.start_frames = max(1, start_frames)
+        self.hangover_frames = max(0, hangover_frames)
+        self.users = {}
+
+        self.frame_bytes = self.SAMPLE_RATE * self.FRAME_MS // 1000 * self.BYTES_PER_SAMPLE # mono
+
+
+    def get(self, user: Hashable) -> UserVoiceActivity:
+
+        if (activity := self.users.get(user)) is None:
+            activity = self.users[user] = UserVoiceActivity(webrtcvad.Vad(self.vad_mode))
+
+        return activity
+
+
+    def process(self, data: bytes, user: Hashable) -> UserVoiceActivity:
+        """Run the VAD on the frames of a packet and update the voice activity of the user."""
+
+        activity = self.get(user)
+        mono = self.downmix(data)
+        view = memoryview(mono).cast("B")
+        now = time.monotonic()
+
+        for offset in range(0, len(view) - self.frame_bytes + 1, self.frame_bytes):
+
+            if activity.vad.is_speech(view[offset:offset + self.frame_bytes], self.SAMPLE_RATE):
+                activity.voiced_frames += 1
+                activity.silent_frames = 0
+
+                if not activity.speaking and activity.voiced_frames >= self.start_frames:
+                    activity.speaking = True
+
+                    if activity.speech_start is None:
+                        activity.speech_start = now
+
+                if activity.speaking:
+                    activity.last_voice = now
+
+            else:
+                activity.silent_frames += 1
+                activity.voiced_frames = 0
+
+                if activity.speaking and activity.silent_frames > self.hangover_frames:
+                    activity.speaking = False
+
+        return activity
+
+
+    @classmethod
+    def downmix(cls, data: bytes) -> np.ndarray:
+        """Average the channels of interleaved 16-bit PCM."""
+
+        samples = np.frombuffer(data, dtype="<i2", count=len(data) // (cls.BYTES_PER_SAMPLE * cls.CHANNELS) * cls.CHANNELS)
+
+        return (samples.reshape(-1, cls.CHANNELS).sum(axis=1, dtype=np.int32) // cls.CHANNELS).astype("<i2")
+
+
+    @property
+    def last_voice(self) -> float | None:
+        """The time of the last voice of any user. Iterates over a snapshot of the users, which may be added by another thread."""
+
+        return max((activity.last_voice for activity in list(self.users.values()) if activity.last_voice is not None), default=None)
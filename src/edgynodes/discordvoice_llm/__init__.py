@@ -1,7 +1,13 @@
 from .core.states import StateProtocol, SharedProtocol
+from .core.segmenter import TextSegmenter
+from .core.pcm_audio import PCMAudioSource
+from .core.tts_cache import TTSCache
 
 
 __all__ = [
     "StateProtocol",
     "SharedProtocol",
+    "TextSegmenter",
+    "PCMAudioSource",
+    "TTSCache",
 ]
\ No newline at end of file
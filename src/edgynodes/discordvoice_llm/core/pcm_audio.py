@@ -0,0 +1,194 @@
+import io
+import threading
+import wave
+
+import discord
+from discord.opus import Encoder as OpusEncoder
+import numpy as np
+
+
+class PCMAudioSource(discord.AudioSource):
+    """Play raw PCM samples from memory without FFmpeg.
+
+    The samples are resampled to 48 kHz stereo 16-bit PCM in-process when they are added, and a linear fade-in is applied.
+    `read` returns 20 ms frames as slices of the converted buffer, so playback does no further work.
+
+    The source can be played while it is still filled: create it without samples, `append` chunks as they are synthesized and `finish` it.
+    `read` never blocks the player thread. If the next frame is not synthesized yet, it returns a frame of silence,
+    so the player keeps its pace and can be stopped at any time.
+
+    Attributes:
+        fade_in: The duration of the fade-in in seconds.
+        duration: The duration of the added audio in seconds.
+    """
+
+    fade_in: float
+    duration: float
+
+    def __init__(self, samples: np.ndarray | None = None, sample_rate: int = OpusEncoder.SAMPLING_RATE, fade_in: float = 0.01) -> None:
+        """
+        Args:
+            samples: The samples, shaped `(frames,)` for mono or `(frames, channels)`. Integer samples are scaled to [-1, 1].
+                If given, the source is finished, otherwise add the samples with `append` and call `finish`.
+            sample_rate: The sample rate of the samples in Hz.
+            fade_in: The duration of the fade-in in seconds.
+        """
+
+        self.fade_in = fade_in
+        self.duration = 0.0
+
+        self._buffer = bytearray()
+        self._position = 0
+        self._finished = False
+        self._lock = threading.Lock()
+
+        if samples is not None:
+            self.append(samples, sample_rate)
+            self.finish()
+
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+
+    def append(self, samples: np.ndarray, sample_rate: int) -> None:
+        """Add samples to the end of the source. The fade-in is applied to the first samples only.
+
+        Samples added after `finish` or `cleanup` are ignored.
+        """
+
+        pcm = self.convert(samples, sample_rate, self.fade_in if not self._buffer else 0.0)
+
+        with self._lock:
+            if self._finished:
+                return
+
+            self._buffer += pcm.tobytes()
+            self.duration += len(pcm) / OpusEncoder.SAMPLING_RATE
+
+
+    def finish(self) -> None:
+        """Mark the source as complete, so `read` ends after the added samples."""
+
+        with self._lock:
+            self._finished = True
+
+
+    @classmethod
+    def from_wav_bytes(cls, data: bytes, fade_in: float = 0.01) -> "PCMAudioSource":
+
+        samples, sample_rate = cls.decode_wav(data)
+        return cls(samples, sample_rate, fade_in=fade_in)
+
+
+    @classmethod
+    def decode_wav(cls, data: bytes) -> tuple[np.ndarray, int]:
+        """Decode PCM WAV bytes to samples shaped `(frames, channels)` and the sample rate."""
+
+        with wave.open(io.BytesIO(data), "rb") as wav_file:
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            sample_rate = wav_file.getframerate()
+            frames = wav_file.readframes(wav_file.getnframes())
+
+        match sample_width:
+            case 1:
+                samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) * 256
+            case 2:
+                samples = np.frombuffer(frames, dtype="<i2")
+            case 4:
+                samples = np.frombuffer(frames, dtype="<i4")
+            case _:
+                raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+        return samples.reshape(-1, channels), sample_rate
+
+
+    @classmethod
+    def encode_wav(cls, samples: np.ndarray, sample_rate: int) -> bytes:
+        """Encode samples to 16-bit PCM WAV bytes."""
+
+        pcm = cls.to_float(samples)
+        pcm = (np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2")
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(pcm.shape[1])
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(pcm.tobytes())
+
+        return buffer.getvalue()
+
+
+    @classmethod
+    def to_float(cls, samples: np.ndarray) -> np.ndarray:
+        """Convert samples to float32 in [-1, 1] shaped `(frames, channels)`."""
+
+        if samples.ndim == 1:
+            samples = samples[:, np.newaxis]
+
+        if np.issubdtype(samples.dtype, np.integer):
+            return samples.astype(np.float32) / np.iinfo(samples.dtype).max
+
+        return samples.astype(np.float32, copy=False)
+
+
+    @classmethod
+    def convert(cls, samples: np.ndarray, sample_rate: int, fade_in: float = 0.0) -> np.ndarray:
+        """Convert samples to interleaved 48 kHz stereo 16-bit PCM shaped `(frames, 2)`."""
+
+        pcm = cls.to_float(samples)
+
+        # Channels
+        if pcm.shape[1] == 1:
+            pcm = np.repeat(pcm, OpusEncoder.CHANNELS, axis=1)
+        elif pcm.shape[1] != OpusEncoder.CHANNELS:
+            pcm = np.repeat(pcm.mean(axis=1, keepdims=True), OpusEncoder.CHANNELS, axis=1)
+
+        # Sample rate (linear interpolation)
+        if sample_rate != OpusEncoder.SAMPLING_RATE and len(pcm):
+            frames = int(round(len(pcm) * OpusEncoder.SAMPLING_RATE / sample_rate))
+            positions = np.arange(frames) * (sample_rate / OpusEncoder.SAMPLING_RATE)
+            source = np.arange(len(pcm))
+            pcm = np.stack([np.interp(positions, source, pcm[:, channel]) for channel in range(pcm.shape[1])], axis=1)
+
+        # Fade-in
+        fade_frames = min(len(pcm), int(fade_in * OpusEncoder.SAMPLING_RATE))
+        if fade_frames > 0:
+            if np.may_share_memory(pcm, samples):
+                pcm = pcm.copy()
+            pcm[:fade_frames] *= np.linspace(0.0, 1.0, fade_frames, endpoint=False, dtype=np.float32)[:, np.newaxis]
+
+        return (np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2")
+
+
+    def read(self) -> bytes:
+
+        with self._lock:
+            if not self._finished and len(self._buffer) - self._position < OpusEncoder.FRAME_SIZE:
+                return bytes(OpusEncoder.FRAME_SIZE) # Synthesis is behind, keep the pace with silence
+
+            frame = bytes(self._buffer[self._position:self._position + OpusEncoder.FRAME_SIZE])
+            self._position += len(frame)
+
+        if not frame:
+            return b""
+
+        if len(frame) < OpusEncoder.FRAME_SIZE: # Pad the last frame with silence
+            return frame + bytes(OpusEncoder.FRAME_SIZE - len(frame))
+
+        return frame
+
+
+    def is_opus(self) -> bool:
+        return False
+
+
+    def cleanup(self) -> None:
+
+        with self._lock:
+            self._buffer = bytearray()
+            self._position = 0
+            self._finished = True
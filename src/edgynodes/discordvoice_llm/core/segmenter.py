@@ -0,0 +1,168 @@
+import re
+
+
+class TextSegmenter:
+    """Split streamed text into segments for speech synthesis.
+
+    Segments end at newlines, sentence ends or clause boundaries (`,` `;` `:` dashes).
+    The first segment is cut as early as possible to start the audio fast, later segments grow up to `max_min_chars`,
+    so the synthesis gets more context and fewer calls.
+
+    A period is only treated as a sentence end if it is followed by whitespace and an uppercase letter or the end of the text,
+    and it does not belong to an abbreviation ("z.B.", "usw.") or a number ("3.5", "3. Mai").
+    The joined segments are equal to the fed text, except for trailing whitespace.
+
+    Attributes:
+        first_min_chars: The minimum length of the first segment.
+        max_min_chars: The maximum minimum length of later segments.
+        growth: The factor by which the minimum length grows with each segment.
+        max_chars: The length at which a segment is cut at the last whitespace if there is no boundary.
+        abbreviations: Lowercase words with a trailing period that do not end a sentence.
+    """
+
+    abbreviations: set[str] = {
+        "z.b.", "d.h.", "u.a.", "o.ä.", "u.ä.", "z.t.", "s.o.", "s.u.", "i.d.r.", "u.u.",
+        "usw.", "bzw.", "ca.", "vgl.", "evtl.", "ggf.", "inkl.", "exkl.", "bspw.", "sog.", "etc.", "zzgl.", "abs.",
+        "nr.", "str.", "dr.", "prof.", "hr.", "fr.", "jh.", "mio.", "mrd.", "tel.", "max.", "min.",
+        "jan.", "feb.", "mär.", "apr.", "jun.", "jul.", "aug.", "sep.", "sept.", "okt.", "nov.", "dez.",
+        "e.g.", "i.e.", "mr.", "mrs.", "ms.", "vs.", "st.", "no.", "approx.",
+    }
+
+    first_min_chars: int
+    max_min_chars: int
+    growth: float
+    max_chars: int
+
+    _sentence_end = re.compile(r"[.!?…]+[\"'»“”)\]]*(?=\s)")
+    _clause_end = re.compile(r"(?:[,;:]|\s[–—-])[\"'»“”)\]]*(?=\s)")
+    _initials = re.compile(r"^(?:\w\.)+$")
+    _number = re.compile(r"^\d+(?:[.,]\d+)*\.$")
+
+    def __init__(self, first_min_chars: int = 20, max_min_chars: int = 120, growth: float = 2.0, max_chars: int = 300) -> None:
+        self.first_min_chars = first_min_chars
+        self.max_min_chars = max(first_min_chars, max_min_chars)
+        self.growth = growth
+        self.max_chars = max(self.max_min_chars, max_chars)
+
+        self._buffer = ""
+        self._count = 0
+
+
+    @property
+    def min_chars(self) -> int:
+        """The minimum length of the next segment."""
+        return min(self.max_min_chars, int(self.first_min_chars * self.growth ** self._count))
+
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text and get the segments that are complete."""
+
+        self._buffer += text
+
+        segments: list[str] = []
+
+        while (cut := self.find_cut(self._buffer, final=False)) is not None:
+            segments.append(self._emit(cut))
+
+        return segments
+
+
+    def flush(self) -> list[str]:
+        """Get the remaining segments at the end of the stream."""
+
+        segments: list[str] = []
+
+        while (cut := self.find_cut(self._buffer, final=True)) is not None:
+            segments.append(self._emit(cut))
+
+        if self._buffer.strip():
+            segments.append(self._emit(len(self._buffer)))
+
+        self._buffer = ""
+
+        return segments
+
+
+    def find_cut(self, text: str, final: bool) -> int | None:
+        """Find the end of the next segment in `text`, including the whitespace after the boundary.
+
+        Args:
+            text: The buffered text.
+            final: Whether no more text follows. Then boundaries at the end of the text are accepted.
+
+        Returns:
+            The index after the segment or `None` if the segment is not complete yet.
+        """
+
+        min_chars = self.min_chars
+        clause_min_chars = min_chars if self._count == 0 else self.max_chars // 2
+
+        # Newlines and sentence ends, whichever comes first
+        newline = text.find("\n", min_chars)
+        end = newline if newline != -1 and text[:newline].strip() else None
+
+        for match in self._sentence_end.finditer(text, min_chars, newline if end is not None else len(text)):
+            if self.is_sentence_end(text, match.start(), match.end(), final):
+                end = match.end()
+                break
+
+        if end is not None:
+            return self._skip_whitespace(text, end)
+
+        # Clause boundaries
+        if len(text) > clause_min_chars:
+            for match in self._clause_end.finditer(text, clause_min_chars):
+                if text[match.start()] in ",;:" and not self.is_sentence_end(text, match.start(), match.end(), final, period=False):
+                    continue
+                return self._skip_whitespace(text, match.end())
+
+        # Too long without boundary
+        if len(text) >= self.max_chars:
+            space = text.rfind(" ", min_chars, self.max_chars)
+            return self._skip_whitespace(text, space if space != -1 else self.max_chars)
+
+        return None
+
+
+    def is_sentence_end(self, text: str, start: int, end: int, final: bool, period: bool = True) -> bool:
+        """Check whether the punctuation in `text[start:end]` (followed by whitespace) ends a segment.
+
+        Args:
+            text: The buffered text.
+            start: The index of the punctuation.
+            end: The index after the punctuation and closing quotes or brackets.
+            final: Whether no more text follows.
+            period: Whether to check abbreviations and numbers for a single period.
+        """
+
+        following = self._skip_whitespace(text, end)
+
+        if following >= len(text): # The next word is unknown yet
+            return final
+
+        if not period or text[start:end].rstrip("\"'»“”)]") != ".":
+            return True
+
+        word = text[:start + 1].split()[-1].lstrip("\"'„“«([").lower()
+
+        if word in self.abbreviations or self._initials.match(word) or self._number.match(word):
+            return False
+
+        return not text[following].islower()
+
+
+    def _emit(self, cut: int) -> str:
+
+        segment, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        self._count += 1
+
+        return segment
+
+
+    @classmethod
+    def _skip_whitespace(cls, text: str, index: int) -> int:
+
+        while index < len(text) and text[index].isspace():
+            index += 1
+
+        return index
@@ -0,0 +1,239 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable
+import asyncio
+import hashlib
+import os
+
+import numpy as np
+
+
+class TTSCache:
+    """Process-wide LRU cache for synthesized speech.
+
+    Entries are the samples and sample rate of a text, keyed by the voice (engine, speaker, config) and the normalized text.
+    Repeated phrases are played without inference.
+
+    The cache has two tiers:
+    - A LRU memory tier limited to `max_memory_bytes`.
+    - An optional persistent disk tier in `directory` limited to `max_disk_bytes`. Entries are written through and survive restarts.
+      The files are read, written and deleted in worker threads, so the event loop is not blocked during playback.
+
+    Attributes:
+        max_memory_bytes: The maximum size of the memory tier.
+        max_disk_bytes: The maximum size of the disk tier.
+        directory: The directory of the disk tier. `None` disables the disk tier.
+    """
+
+    max_memory_bytes: int = 64 * 1024 * 1024
+    max_disk_bytes: int = 512 * 1024 * 1024
+    directory: Path | None = None
+
+    _memory: OrderedDict[str, tuple[np.ndarray, int]] = OrderedDict() # digest -> (samples, sample rate)
+    _memory_bytes: int = 0
+    _disk: OrderedDict[str, int] | None = None # digest -> size, read from the directory on first use
+    _disk_bytes: int = 0
+
+    hits: int = 0
+    misses: int = 0
+
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        return " ".join(text.split())
+
+
+    @classmethod
+    def key(cls, voice: Hashable, text: str) -> str:
+        """Get the digest of the voice and the normalized text."""
+
+        return hashlib.sha256(repr((voice, cls.normalize(text))).encode()).hexdigest()
+
+
+    @classmethod
+    async def get(cls, key: str) -> tuple[np.ndarray, int] | None:
+
+        if (entry := cls._memory.get(key)) is not None:
+            cls._memory.move_to_end(key)
+            cls.hits += 1
+            return entry
+
+        if (entry := await cls._read_disk(key)) is not None:
+            cls._put_memory(key, entry)
+            cls.hits += 1
+            return entry
+
+        cls.misses += 1
+        return None
+
+
+    @classmethod
+    async def put(cls, key: str, samples: np.ndarray, sample_rate: int) -> None:
+
+        entry = (np.ascontiguousarray(samples), sample_rate)
+
+        cls._put_memory(key, entry)
+        await cls._write_disk(key, entry)
+
+
+    @classmethod
+    async def clear(cls, disk: bool = False) -> None:
+        """Clear the memory tier, and the disk tier if `disk` is set."""
+
+        cls._memory.clear()
+        cls._memory_bytes = 0
+
+        if disk:
+            await cls._forget_disk(*await cls._disk_index())
+
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "memory_entries": len(cls._memory),
+            "memory_bytes": cls._memory_bytes,
+            "disk_entries": len(cls._disk or {}),
+            "disk_bytes": cls._disk_bytes,
+        }
+
+
+    @classmethod
+    def _put_memory(cls, key: str, entry: tuple[np.ndarray, int]) -> None:
+
+        if key in cls._memory:
+            cls._memory.move_to_end(key)
+            return
+
+        cls._memory[key] = entry
+        cls._memory_bytes += entry[0].nbytes
+
+        while cls._memory_bytes > cls.max_memory_bytes and len(cls._memory) > 1:
+            _, evicted = cls._memory.popitem(last=False)
+            cls._memory_bytes -= evicted[0].nbytes
+
+
+    @classmethod
+    async def _disk_index(cls) -> OrderedDict[str, int]:
+        """Get the entries of the disk tier, oldest first. The directory is scanned once, then the index is kept in memory."""
+
+        if cls._disk is None:
+            entries = await asyncio.to_thread(cls._scan_disk, cls.directory) if cls.directory is not None else []
+
+            if cls._disk is None: # Another task may have scanned the directory meanwhile
+                cls._disk = OrderedDict(entries)
+                cls._disk_bytes = sum(cls._disk.values())
+
+        return cls._disk
+
+
+    @classmethod
+    def _scan_disk(cls, directory: Path) -> list[tuple[str, int]]:
+        """Get the keys and sizes of the entries in the directory, oldest first. Runs in a worker thread."""
+
+        if not directory.is_dir():
+            return []
+
+        stats = [(path.stem, path.stat()) for path in directory.glob("*.npz")]
+        stats.sort(key=lambda item: item[1].st_mtime)
+
+        return [(key, stat.st_size) for key, stat in stats]
+
+
+    @classmethod
+    async def _read_disk(cls, key: str) -> tuple[np.ndarray, int] | None:
+
+        directory = cls.directory
+
+        if directory is None or key not in await cls._disk_index():
+            return None
+
+        def read() -> tuple[np.ndarray, int]:
+            with np.load(directory / f"{key}.npz") as data:
+                return data["samples"], int(data["sample_rate"])
+
+        try:
+            entry = await asyncio.to_thread(read)
+
+        except (OSError, ValueError, KeyError):
+            await cls._forget_disk(key)
+            return None
+
+        if key in (disk := await cls._disk_index()):
+            disk.move_to_end(key)
+
+        return entry
+
+
+    @classmethod
+    async def _write_disk(cls, key: str, entry: tuple[np.ndarray, int]) -> None:
+
+        directory = cls.directory
+
+        if directory is None or key in await cls._disk_index():
+            return
+
+        def write() -> int:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{key}.npz"
+            tmp_path = directory / f"{key}.tmp"
+            with open(tmp_path, "wb") as file:
+                np.savez(file, samples=entry[0], sample_rate=entry[1])
+            os.replace(tmp_path, path)
+            return path.stat().st_size
+
+        try:
+            size = await asyncio.to_thread(write)
+
+        except OSError as e:
+            print(f"Unable to write TTS cache entry {key} to disk: {e}")
+            return
+
+        disk = await cls._disk_index()
+
+        if key in disk: # Written concurrently by another task
+            return
+
+        disk[key] = size
+        cls._disk_bytes += size
+
+        evicted: list[str] = []
+        remaining = cls._disk_bytes
+
+        for evicted_key, evicted_size in disk.items():
+            if remaining <= cls.max_disk_bytes or len(evicted) >= len(disk) - 1:
+                break
+            evicted.append(evicted_key)
+            remaining -= evicted_size
+
+        await cls._forget_disk(*evicted)
+
+
+    @classmethod
+    async def _forget_disk(cls, *keys: str) -> None:
+        """Remove the entries from the index and delete their files in a worker thread."""
+
+        disk = await cls._disk_index()
+        removed: list[str] = []
+
+        for key in keys:
+            if (size := disk.pop(key, None)) is not None:
+                cls._disk_bytes -= size
+                removed.append(key)
+
+        directory = cls.directory
+
+        if directory is None or not removed:
+            return
+
+        def unlink() -> None:
+            for key in removed:
+                (directory / f"{key}.npz").unlink(missing_ok=True)
+
+        try:
+            await asyncio.to_thread(unlink)
+
+        except OSError as e:
+            print(f"Unable to delete TTS cache entries from disk: {e}")
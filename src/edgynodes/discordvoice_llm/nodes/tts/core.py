@@ -1,31 +1,101 @@
-from abc import abstractmethod
+from typing import AsyncIterator, Hashable, Iterable
 import asyncio
-import io
 
 import discord
+import numpy as np
 from edgygraph import Node
 from llmir import AIRoles, AIChunkText, AIMessage
 
 from ...core.states import StateProtocol, SharedProtocol
+from ...core.segmenter import TextSegmenter
+from ...core.pcm_audio import PCMAudioSource
+from ...core.tts_cache import TTSCache
 from ....discordvoice import InterruptException
 
 
 class BaseTTSNode[T: StateProtocol, S: SharedProtocol](Node[StateProtocol, SharedProtocol]):
     """
-    Abstract base for TTS nodes. Subclasses implement `synthesize_to_wav_bytes(text) -> bytes`.
+    Abstract base for TTS nodes. Subclasses implement `generate_pcm(text) -> (samples, sample_rate)` or `generate_wav_bytes(text) -> bytes`.
     Handles all Discord playback, streaming logic, and interrupt handling.
+
+    The samples are played by a `PCMAudioSource`, which resamples them in-process, so no FFmpeg process is started per segment.
+    Engines that synthesize in chunks implement `stream_pcm`, then the playback of a segment starts with its first chunk.
+
+    Synthesized segments are stored in the `TTSCache` if the engine provides a `cache_key` and `use_cache` is set,
+    so repeated phrases are played without inference. Use `prewarm` to synthesize known phrases ahead of time.
+
+    Streamed responses are spoken by a pipeline of three stages that run concurrently:
+    reading the LLM stream into text segments, synthesizing the segments, and playing the audio in order.
+    The stream is never blocked by synthesis or playback, and the next segments are synthesized while the current one is playing.
+
+    The stream is split into segments by a `TextSegmenter` at sentence and clause boundaries.
+    The first segment is short to start speaking fast, later segments grow up to `max_stream_chunk_length`.
+
+    Attributes:
+        min_stream_chunk_length: The minimum length of the first streamed text segment.
+        max_stream_chunk_length: The minimum length the streamed text segments grow to.
+        synthesis_workers: The maximum number of segments synthesized at the same time.
+        lookahead: The maximum number of segments synthesized ahead of playback, including the segments being synthesized.
+        use_cache: Whether to use the `TTSCache`.
     """
 
-    dependencies: set[str] = {"py-cord", "llmir"}
+    dependencies: set[str] = {"py-cord", "llmir", "numpy"}
+
+    min_stream_chunk_length: int
+    max_stream_chunk_length: int
+    synthesis_workers: int
+    lookahead: int
+    use_cache: bool
+
+    def __init__(self, min_stream_chunk_length: int = 20, synthesis_workers: int = 1, lookahead: int = 3, max_stream_chunk_length: int = 120, use_cache: bool = True) -> None:
+
+        if synthesis_workers < 1:
+            raise ValueError("synthesis_workers must be at least 1")
+
+        if lookahead < 1:
+            raise ValueError("lookahead must be at least 1")
 
-    def __init__(self, min_stream_chunk_length: int = 20) -> None:
         self.min_stream_chunk_length = min_stream_chunk_length
+        self.max_stream_chunk_length = max(min_stream_chunk_length, max_stream_chunk_length)
+        self.synthesis_workers = synthesis_workers
+        self.lookahead = lookahead
+        self.use_cache = use_cache
         
 
-    @abstractmethod
+    async def generate_pcm(self, text: str, interrupt: asyncio.Event) -> tuple[np.ndarray, int]:
+        """Synthesize text to samples shaped `(frames,)` or `(frames, channels)` and their sample rate.
+
+        Engines with raw samples override this. By default the samples are decoded from `generate_wav_bytes`.
+        """
+
+        if type(self).generate_wav_bytes is BaseTTSNode.generate_wav_bytes:
+            raise NotImplementedError(f"{type(self).__name__} must implement generate_pcm or generate_wav_bytes")
+
+        return PCMAudioSource.decode_wav(await self.generate_wav_bytes(text, interrupt))
+
+
+    async def stream_pcm(self, text: str, interrupt: asyncio.Event) -> AsyncIterator[tuple[np.ndarray, int]]:
+        """Synthesize text to consecutive chunks of samples and their sample rate.
+
+        Engines that produce audio incrementally override this. By default the result of `generate_pcm` is yielded as one chunk.
+        """
+
+        yield await self.generate_pcm(text, interrupt)
+
+
     async def generate_wav_bytes(self, text: str, interrupt: asyncio.Event) -> bytes:
-        """Synthesize text to WAV bytes (PCM, standard wav container)."""
-        ...
+        """Synthesize text to WAV bytes (PCM, standard wav container).
+
+        By default the samples of `generate_pcm` are encoded.
+        """
+
+        if type(self).generate_pcm is BaseTTSNode.generate_pcm:
+            raise NotImplementedError(f"{type(self).__name__} must implement generate_pcm or generate_wav_bytes")
+
+        samples, sample_rate = await self.generate_pcm(text, interrupt)
+
+        return PCMAudioSource.encode_wav(samples, sample_rate)
+
 
     async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
 
@@ -48,8 +118,9 @@ class BaseTTSNode[T: StateProtocol, S: SharedProtocol](Node[StateProtocol, Share
                     current_text += text
 
         try:
-            audio = await self.tts(current_text, interrupt)
-            await self.play(voice_client, audio, interrupt)
+            if current_text:
+                audio = await self.tts(current_text, interrupt)
+                await self.play(voice_client, audio, interrupt)
 
         except InterruptException:
             async with shared.lock:
@@ -59,98 +130,213 @@ class BaseTTSNode[T: StateProtocol, S: SharedProtocol](Node[StateProtocol, Share
         if stream is None:
             return
 
-        # Stream new messages
-        queue: asyncio.Queue[discord.FFmpegPCMAudio | None] = asyncio.Queue(maxsize=1)
-        completed: str = ""
-
+        # Stream new messages: read stream -> synthesize -> play in order
+        texts: asyncio.Queue[str | None] = asyncio.Queue()
+        audios: asyncio.Queue[tuple[str, PCMAudioSource, asyncio.Event, asyncio.Task[None]] | None] = asyncio.Queue()
+        ahead = asyncio.Semaphore(self.lookahead)
+        workers = asyncio.Semaphore(self.synthesis_workers)
+        spoken: list[str] = []
 
-        async def enqueue(text: str):
-            nonlocal queue
-            nonlocal completed
-            audio = await self.tts(text, interrupt)
-            await queue.put(audio)
-            completed += text
 
+        async def reader():
+            try:
+                async with stream:
 
-        async def producer():
-            nonlocal state
-            nonlocal completed
-                
-            async with stream:
-
-                try:
-                    pending = ""
+                    segmenter = self.create_segmenter()
                     
                     async for chunk in stream:
+
+                        if interrupt.is_set():
+                            raise InterruptException("Stream interrupted")
+
                         if isinstance(chunk, AIChunkText):
-                            pending += chunk.text
+                            for segment in segmenter.feed(chunk.text):
+                                texts.put_nowait(segment)
+
+                    for segment in segmenter.flush():
+                        texts.put_nowait(segment)
 
-                            while pending:
-                                complete, pending = self.extract_complete_lines(pending, min_chars=self.min_stream_chunk_length)
+            finally:
+                texts.put_nowait(None)
 
-                                if not complete:
-                                    break
-                                
-                                await enqueue(complete)
 
-                    
-                    while pending:
-                        complete, pending = self.extract_complete_lines(pending, min_chars=self.min_stream_chunk_length)
+        async def synthesize(text: str, audio: PCMAudioSource, started: asyncio.Event) -> None:
+            async with workers:
+                await self.synthesize_into(text, audio, interrupt, started)
+
+
+        async def synthesizer():
+            try:
+                while (text := await texts.get()) is not None:
+                    await ahead.acquire() # Released after playback
+                    audio = PCMAudioSource(fade_in=0.01)
+                    started = asyncio.Event()
+                    audios.put_nowait((text, audio, started, asyncio.create_task(synthesize(text, audio, started))))
+
+            finally:
+                audios.put_nowait(None)
+
+
+        async def player():
+            while (item := await audios.get()) is not None:
+                text, audio, started, synthesis = item
+
+                try:
+                    # Start playing with the first chunk, the rest is added while playing
+                    waiter = asyncio.create_task(started.wait())
+                    await asyncio.wait([synthesis, waiter], return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+
+                    if synthesis.done():
+                        synthesis.result() # Raise synthesis errors
 
-                        if not complete:
-                            complete = pending
-                            pending = ""
+                    spoken.append(text)
+                    await self.play(voice_client, audio, interrupt)
+                    await synthesis
 
-                        await enqueue(complete)
-                
                 finally:
-                    state.llm.new_messages.append(
-                        AIMessage(
-                            role=AIRoles.MODEL,
-                            chunks=[AIChunkText(text=completed)]
-                        )
-                    )
-                    
-                    await queue.put(None)
+                    ahead.release()
 
 
-        async def consumer():
-            while (audio := await queue.get()) is not None:
-                await self.play(voice_client, audio, interrupt)
+        tasks = [asyncio.create_task(stage()) for stage in (reader, synthesizer, player)]
 
         try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
 
-            producer_task = producer()
-            consumer_task = consumer()
-
-            try:
-                await producer_task
-            finally:
-                await queue.put(None)
-                await consumer_task
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception() # type: ignore
 
         finally:
+            for task in tasks:
+                task.cancel()
+
+            # Cancel synthesis of segments that will not be played
+            pending_syntheses: list[asyncio.Task[None]] = []
+            while not audios.empty():
+                if (item := audios.get_nowait()) is not None:
+                    item[3].cancel()
+                    pending_syntheses.append(item[3])
+
+            await asyncio.gather(*tasks, *pending_syntheses, return_exceptions=True)
+
+            state.llm.new_messages.append(
+                AIMessage(
+                    role=AIRoles.MODEL,
+                    chunks=[AIChunkText(text="".join(spoken))]
+                )
+            )
+
             async with shared.lock:
                 shared.llm.stream = None
 
 
 
-    async def tts(self, text: str, interrupt: asyncio.Event) -> discord.FFmpegPCMAudio:
+    def create_segmenter(self) -> TextSegmenter:
+        """Create the segmenter that splits the streamed text of one response into segments for synthesis."""
+
+        return TextSegmenter(
+            first_min_chars=self.min_stream_chunk_length,
+            max_min_chars=self.max_stream_chunk_length,
+            max_chars=max(self.max_stream_chunk_length * 2, 300),
+        )
+
+
+    async def tts(self, text: str, interrupt: asyncio.Event) -> PCMAudioSource:
         if not text:
             raise ValueError("Text is empty")
 
-        wav_bytes = await self.generate_wav_bytes(text, interrupt)
+        audio = PCMAudioSource(fade_in=0.01)
+        await self.synthesize_into(text, audio, interrupt)
 
-        if interrupt.is_set():
-            raise InterruptException("Voice generation interrupted")
-
-        audio_buffer = io.BytesIO(wav_bytes)
-        return discord.FFmpegPCMAudio(
-            audio_buffer,
-            pipe=True,
-            before_options='-f wav',
-            options='-af afade=t=in:st=0:d=0.01',
-        )
+        return audio
+
+
+    async def synthesize_into(self, text: str, audio: PCMAudioSource, interrupt: asyncio.Event, started: asyncio.Event | None = None) -> None:
+        """Synthesize text chunk by chunk into the audio source and finish it.
+
+        Args:
+            text: The text to synthesize.
+            audio: The audio source to add the chunks to.
+            interrupt: Stops the synthesis between chunks.
+            started: Set when the first chunk was added.
+        """
+
+        if not text:
+            raise ValueError("Text is empty")
+
+        key = self.get_cache_key(text)
+
+        try:
+            if key is not None and (cached := await TTSCache.get(key)) is not None:
+                audio.append(*cached)
+
+                if started is not None:
+                    started.set()
+
+                return
+
+            chunks: list[tuple[np.ndarray, int]] = []
+
+            async for samples, sample_rate in self.stream_pcm(text, interrupt):
+
+                if interrupt.is_set():
+                    raise InterruptException("Voice generation interrupted")
+
+                audio.append(samples, sample_rate)
+                chunks.append((samples, sample_rate))
+
+                if started is not None:
+                    started.set()
+
+            if key is not None:
+                audio.finish() # Do not hold back the end of playback for the cache write
+                await self.cache_chunks(key, chunks)
+
+        finally:
+            audio.finish()
+
+
+    def cache_key(self) -> Hashable | None:
+        """Identify the voice of the engine, including the speaker and the synthesis config.
+
+        Engines return a value that changes whenever the output for the same text changes. `None` disables the cache.
+        """
+
+        return None
+
+
+    def get_cache_key(self, text: str) -> str | None:
+
+        if not self.use_cache or (voice := self.cache_key()) is None:
+            return None
+
+        return TTSCache.key(voice, text)
+
+
+    @classmethod
+    async def cache_chunks(cls, key: str, chunks: list[tuple[np.ndarray, int]]) -> None:
+        """Store the synthesized chunks of a text as one entry, if they share a sample rate and channel count."""
+
+        if not chunks or len({(sample_rate, samples.shape[1:]) for samples, sample_rate in chunks}) != 1:
+            return
+
+        samples = chunks[0][0] if len(chunks) == 1 else np.concatenate([samples for samples, _ in chunks])
+
+        await TTSCache.put(key, samples, chunks[0][1])
+
+
+    async def prewarm(self, phrases: Iterable[str]) -> None:
+        """Synthesize phrases into the `TTSCache` that are not cached yet, e.g. greetings and status messages on startup."""
+
+        interrupt = asyncio.Event()
+
+        for phrase in phrases:
+
+            if not phrase.strip() or (key := self.get_cache_key(phrase)) is None or await TTSCache.get(key) is not None:
+                continue
+
+            await self.cache_chunks(key, [chunk async for chunk in self.stream_pcm(phrase, interrupt)])
 
 
     @classmethod
@@ -1,21 +1,86 @@
-import io
-import wave
 import asyncio
-from typing import Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Hashable, Iterator, Literal, Tuple
+import multiprocessing
 
-from piper import PiperVoice, SynthesisConfig
+import numpy as np
+from piper import AudioChunk, PiperVoice, SynthesisConfig
 
 from .core import BaseTTSNode
 from ...core.states import StateProtocol, SharedProtocol
+from ....discordvoice import InterruptException
+
+
+# Voices loaded in this process, also in the worker processes
+_voices: dict[tuple[str, str], PiperVoice] = {}
+
+
+def _load_voice(files: tuple[str, str]) -> PiperVoice:
+
+    if files not in _voices:
+        _voices[files] = PiperVoice.load(files[0], files[1])
+
+    return _voices[files]
+
+
+def _synthesize_sentences(files: tuple[str, str], text: str, syn_config: SynthesisConfig | None) -> Iterator[AudioChunk]:
+    """Start `PiperVoice.synthesize`, which synthesizes one sentence per step of the iterator."""
+
+    return iter(_load_voice(files).synthesize(text, syn_config))
+
+
+def _phonemize(files: tuple[str, str], text: str) -> list[list[str]]:
+    return _load_voice(files).phonemize(text)
+
+
+def _synthesize_phonemes(files: tuple[str, str], phonemes: list[str], syn_config: SynthesisConfig | None) -> np.ndarray:
+    """Synthesize the phonemes of one sentence like `PiperVoice.synthesize`.
+
+    Only used by the process pool, where the iterator of `PiperVoice.synthesize` can not be shared with the event loop.
+    Mirrors the post-processing of `PiperVoice.synthesize` in piper-tts 1.8.0, check it when updating piper-tts.
+    """
+
+    voice = _load_voice(files)
+    syn_config = syn_config or SynthesisConfig()
+
+    audio = voice.phoneme_ids_to_audio(voice.phonemes_to_ids(phonemes), syn_config)
+
+    if isinstance(audio, tuple): # Audio with alignments
+        audio = audio[0]
+
+    if syn_config.normalize_audio:
+        max_value = np.max(np.abs(audio)) if audio.size else 0.0
+        audio = audio / max_value if max_value >= 1e-8 else np.zeros_like(audio)
+
+    if syn_config.volume != 1.0:
+        audio = audio * syn_config.volume
+
+    return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
 
 
 class PiperTTSNode(BaseTTSNode[StateProtocol, SharedProtocol]):
-    """TTS via local Piper model."""
+    """TTS via local Piper model.
 
-    dependencies = {"piper-tts"}
+    The synthesis runs in a thread or process pool with the voice preloaded in each worker, so the event loop is never blocked.
+    The audio is streamed sentence by sentence, and the interrupt is checked between the sentences.
+    The pools are shared by all nodes with the same voice files and pool configuration.
+
+    Attributes:
+        files: The paths of the ONNX model and its JSON config.
+        pool: Whether to synthesize in a `"thread"` or `"process"` pool. Processes avoid contention with the event loop for the GIL.
+        pool_workers: The number of workers in the pool.
+    """
+
+    dependencies = {"piper-tts", "numpy"}
 
     voice: PiperVoice
     syn_config: SynthesisConfig | None
+    files: tuple[str, str]
+    pool: Literal["thread", "process"]
+    pool_workers: int
+
+    _executors: dict[tuple[tuple[str, str], str, int], Executor] = {}
 
     def __init__(
         self,
@@ -25,13 +90,94 @@ class PiperTTSNode(BaseTTSNode[StateProtocol, SharedProtocol]):
         ),
         syn_config: SynthesisConfig | None = None,
         min_stream_chunk_length: int = 20,
+        synthesis_workers: int = 1,
+        lookahead: int = 3,
+        max_stream_chunk_length: int = 120,
+        pool: Literal["thread", "process"] = "thread",
+        pool_workers: int = 1,
+        use_cache: bool = True,
     ) -> None:
-        super().__init__(min_stream_chunk_length)
-        self.voice = PiperVoice.load(files[0], files[1])
+        super().__init__(min_stream_chunk_length, synthesis_workers, lookahead, max_stream_chunk_length, use_cache)
+        self.files = (files[0], files[1])
+        self.voice = _load_voice(self.files)
         self.syn_config = syn_config
+        self.pool = pool
+        self.pool_workers = pool_workers
+
+        self.get_executor(self.files, pool, pool_workers)
+
+
+    @property
+    def executor(self) -> Executor:
+        return self.get_executor(self.files, self.pool, self.pool_workers)
+
+
+    @classmethod
+    def get_executor(cls, files: tuple[str, str], pool: Literal["thread", "process"], workers: int) -> Executor:
+        """Get the shared pool for the voice, the voice is loaded in each worker on start."""
+
+        key = (files, pool, workers)
+
+        if key not in cls._executors:
+            match pool:
+                case "thread":
+                    cls._executors[key] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="piper", initializer=_load_voice, initargs=(files,))
+                case "process":
+                    cls._executors[key] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_load_voice, initargs=(files,))
+
+        return cls._executors[key]
+
+
+    @classmethod
+    def shutdown_executors(cls, wait: bool = True) -> None:
+
+        for executor in cls._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+        cls._executors.clear()
+
+
+    def cache_key(self) -> Hashable | None:
+        return ("piper", self.files, repr(self.syn_config))
+
+
+    async def stream_pcm(self, text: str, interrupt: asyncio.Event) -> AsyncIterator[tuple[np.ndarray, int]]:
+
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+
+        if self.pool == "thread":
+            # Step the public synthesis iterator in the pool, one sentence at a time
+            chunks = await loop.run_in_executor(executor, _synthesize_sentences, self.files, text, self.syn_config)
+
+            while not interrupt.is_set():
+                chunk = await loop.run_in_executor(executor, next, chunks, None)
+
+                if chunk is None:
+                    return
+
+                yield chunk.audio_float_array, chunk.sample_rate
+
+            raise InterruptException("Voice generation interrupted")
+
+        sentences = await loop.run_in_executor(executor, _phonemize, self.files, text)
+
+        for phonemes in sentences:
+
+            if interrupt.is_set():
+                raise InterruptException("Voice generation interrupted")
+
+            if not phonemes:
+                continue
+
+            samples = await loop.run_in_executor(executor, _synthesize_phonemes, self.files, phonemes, self.syn_config)
+
+            yield samples, self.voice.config.sample_rate
+
+
+    async def generate_pcm(self, text: str, interrupt: asyncio.Event) -> tuple[np.ndarray, int]:
+
+        chunks = [samples async for samples, _ in self.stream_pcm(text, interrupt)]
+        samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
 
-    async def generate_wav_bytes(self, text: str, interrupt: asyncio.Event) -> bytes:
-        audio_buffer = io.BytesIO()
-        with wave.open(audio_buffer, 'wb') as wav_file:
-            self.voice.synthesize_wav(text, wav_file, syn_config=self.syn_config)
-        return audio_buffer.getvalue()
\ No newline at end of file
+        return samples, self.voice.config.sample_rate
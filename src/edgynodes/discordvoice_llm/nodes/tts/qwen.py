@@ -1,12 +1,14 @@
 import asyncio
-import io
-import soundfile as sf # type: ignore
+from concurrent.futures import ThreadPoolExecutor
+from typing import Hashable
+import numpy as np
 import torch
 
 from qwen_tts import Qwen3TTSModel  # type: ignore
 
 from .core import BaseTTSNode
 from ...core.states import StateProtocol, SharedProtocol
+from ....discordvoice import InterruptException
 
 
 class Qwen3TTSNode(BaseTTSNode[StateProtocol, SharedProtocol]):
@@ -16,9 +18,24 @@ class Qwen3TTSNode(BaseTTSNode[StateProtocol, SharedProtocol]):
     The `instruct` is a natural language prompt used by VoiceDesign,
     e.g. "A warm, male German voice speaking calmly".
     For CustomVoice, pass the appropriate `speaker` parameter instead.
+
+    The model is owned by a single inference worker thread.
+    Segments that are queued while the worker is busy are synthesized together in one batch of up to `max_batch_size`.
+    Queued segments are dropped when their interrupt is set or their caller is cancelled.
+    Set `synthesis_workers` to the `lookahead` (the default) so the pipeline queues segments for batching.
+    Call `aclose` when the node is not used anymore to stop the worker and free the model.
+
+    Attributes:
+        speakers: The speakers supported by the model, or `None` for VoiceDesign models. Read once on load.
+        max_batch_size: The maximum number of segments synthesized in one call.
+        batch_window: The time in seconds the worker waits for more segments before starting a batch.
     """
 
-    dependencies = {"qwen-tts", "soundfile", "torch"}
+    dependencies = {"qwen-tts", "torch", "numpy"}
+
+    speakers: list[str] | None
+    max_batch_size: int
+    batch_window: float
 
     def __init__(
         self,
@@ -28,45 +45,156 @@ class Qwen3TTSNode(BaseTTSNode[StateProtocol, SharedProtocol]):
         instruct: str = "A calm, natural German male voice",
         device_map: str = "cuda:0",
         min_stream_chunk_length: int = 20,
+        synthesis_workers: int = 3,
+        lookahead: int = 3,
+        max_stream_chunk_length: int = 120,
+        max_batch_size: int = 4,
+        batch_window: float = 0.0,
+        dtype: torch.dtype | None = None,
+        use_cache: bool = True,
     ) -> None:
-        super().__init__(min_stream_chunk_length)
+        super().__init__(min_stream_chunk_length, synthesis_workers, lookahead, max_stream_chunk_length, use_cache)
         self.tts_model = Qwen3TTSModel.from_pretrained( # type: ignore
-            model_name, 
+            model_name,
             device_map=device_map,
-            dtype = torch.bfloat16
+            dtype = dtype if dtype is not None else (torch.bfloat16 if device_map.startswith("cuda") else torch.float32)
         )
+        self.model_name = model_name
         self.voice_instruct = instruct
         self.speaker = speaker
         self.language = language
+        self.speakers = self.tts_model.get_supported_speakers()
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qwen-tts")
+        self._requests: asyncio.Queue[tuple[str, asyncio.Future[tuple[np.ndarray, int]], asyncio.Event]] | None = None
+        self._worker: asyncio.Task[None] | None = None
+
+
+    def cache_key(self) -> Hashable | None:
+        return ("qwen3", self.model_name, self.speaker if self.speakers else None, self.language, self.voice_instruct)
+
+
+    async def generate_pcm(self, text: str, interrupt: asyncio.Event) -> tuple[np.ndarray, int]:
+
+        requests = self._ensure_worker()
+
+        future: asyncio.Future[tuple[np.ndarray, int]] = asyncio.get_running_loop().create_future()
+        requests.put_nowait((text, future, interrupt))
+
+        return await future
+
+
+    def _ensure_worker(self) -> asyncio.Queue[tuple[str, asyncio.Future[tuple[np.ndarray, int]], asyncio.Event]]:
+        """Start the worker on the running event loop if it is not running."""
+
+        loop = asyncio.get_running_loop()
+
+        if self._requests is None or self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._requests = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._requests))
+
+        return self._requests
+
+
+    async def _run(self, requests: asyncio.Queue[tuple[str, asyncio.Future[tuple[np.ndarray, int]], asyncio.Event]]) -> None:
+
+        loop = asyncio.get_running_loop()
+        batch: list[tuple[str, asyncio.Future[tuple[np.ndarray, int]], asyncio.Event]] = []
+
+        try:
+            while True:
+                batch = await self._next_batch(requests)
+
+                if not batch:
+                    continue
+
+                try:
+                    audios, sample_rate = await loop.run_in_executor(self._executor, self._generate_voices, [text for text, _, _ in batch])
+
+                except Exception as e:
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
 
-    async def generate_wav_bytes(self, text: str, interrupt: asyncio.Event) -> bytes:
-        # qwen-tts inference is synchronous/blocking → run in threadpool
-        loop = asyncio.get_event_loop()
-        wav_bytes = await loop.run_in_executor(None, self._generate_voice, text)
-        return wav_bytes
+                for (_, future, _), audio in zip(batch, audios):
+                    if not future.done():
+                        future.set_result((np.asarray(audio, dtype=np.float32), sample_rate))
 
-    def _generate_voice(self, text: str) -> bytes:
-        print(self.tts_model.get_supported_speakers())
+                batch = []
 
-        if self.tts_model.get_supported_speakers():
+        except asyncio.CancelledError:
+            # Do not leave callers waiting for a stopped worker
+            for _, future, _ in batch:
+                future.cancel()
+
+            while not requests.empty():
+                requests.get_nowait()[1].cancel()
+
+            raise
+
+
+    async def _next_batch(self, requests: asyncio.Queue[tuple[str, asyncio.Future[tuple[np.ndarray, int]], asyncio.Event]]) -> list[tuple[str, asyncio.Future[tuple[np.ndarray, int]], asyncio.Event]]:
+        """Wait for the next request and add the queued requests to its batch. Cancelled and interrupted requests are dropped."""
+
+        batch = [await requests.get()]
+
+        if self.batch_window > 0:
+            await asyncio.sleep(self.batch_window)
+
+        while len(batch) < self.max_batch_size and not requests.empty():
+            batch.append(requests.get_nowait())
+
+        # Drop cancelled and interrupted requests
+        for _, future, interrupt in batch:
+            if interrupt.is_set() and not future.done():
+                future.set_exception(InterruptException("Voice generation interrupted"))
+
+        return [request for request in batch if not request[1].done()]
+
+
+    async def aclose(self) -> None:
+        """Stop the inference worker and its thread, so the node and the model can be freed. Queued segments are cancelled."""
+
+        worker = self._worker
+        self.close()
+
+        if worker is not None and worker.get_loop() is asyncio.get_running_loop():
+            await asyncio.gather(worker, return_exceptions=True)
+
+
+    def close(self) -> None:
+        """Stop the inference worker and its thread without waiting for them."""
+
+        if self._worker is not None and not self._worker.done():
+            loop = self._worker.get_loop()
+
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._worker.cancel)
+
+        self._worker = None
+        self._requests = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def _generate_voices(self, texts: list[str]) -> tuple[list[np.ndarray], int]:
+
+        if self.speakers:
             result = self.tts_model.generate_custom_voice( # type: ignore
-                text,
-                speaker=self.speaker,
-                language=self.language,
-                instruct=self.voice_instruct,
+                texts,
+                speaker=[self.speaker] * len(texts),
+                language=[self.language] * len(texts),
+                instruct=[self.voice_instruct] * len(texts),
             )
 
         else:
             result = self.tts_model.generate_voice_design( # type: ignore
-                text,
-                instruct=self.voice_instruct,
-                language=self.language,
+                texts,
+                instruct=[self.voice_instruct] * len(texts),
+                language=[self.language] * len(texts),
             )
 
         audio_list, sample_rate = result
-        audio = audio_list[0]
-
-        buf = io.BytesIO()
-        sf.write(buf, audio, sample_rate, format="WAV", subtype="PCM_16") # type: ignore
-        buf.seek(0)
-        return buf.read()
\ No newline at end of file
+        return list(audio_list), sample_rate
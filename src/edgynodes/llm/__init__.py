@@ -1,6 +1,8 @@
 from .core.nodes import LLMNode
 from .core.supports import Supports
 from .core.streams import LLMStream
+from .core.clients import HTTPClientManager
+from .core.images import ImageInliner
 from .core.states import StateProtocol, SharedProtocol, StateAttribute, SharedAttribute
 
 __all__ = [
@@ -11,4 +13,6 @@ __all__ = [
     "LLMNode",
     "Supports",
     "LLMStream",
+    "HTTPClientManager",
+    "ImageInliner",
 ]
\ No newline at end of file
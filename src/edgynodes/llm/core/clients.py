@@ -0,0 +1,145 @@
+from typing import Any, Callable, Hashable
+import asyncio
+import inspect
+
+import httpx
+
+
+class HTTPClientManager:
+    """Process-wide registry of long-lived HTTP clients.
+
+    Nodes are often built per message, so they get their clients from this registry instead of creating them.
+    Clients are shared by key, e.g. `(kind, base_url, api_key, options)`, and keep their connections alive between messages.
+
+    A client is bound to the event loop it is first used on. When it is requested on another event loop, a new client replaces it.
+
+    Set the pool settings before the first client is created. Call `shutdown` on application exit to close the connections.
+
+    Attributes:
+        max_connections: The maximum number of connections per client.
+        max_keepalive_connections: The maximum number of idle connections kept alive per client.
+        keepalive_expiry: The time in seconds an idle connection is kept alive.
+        timeout: The default request timeout in seconds.
+        connect_timeout: The timeout in seconds to establish a connection.
+        http2: Whether to use HTTP/2, requires the `h2` package.
+        on_create: Callbacks called with the key and the client when a client is created.
+        on_close: Callbacks called with the key and the client before a client is closed.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    timeout: float = 600.0
+    connect_timeout: float = 5.0
+    http2: bool = False
+
+    on_create: list[Callable[[Hashable, Any], None]] = []
+    on_close: list[Callable[[Hashable, Any], None]] = []
+
+    _clients: dict[Hashable, tuple[Any, asyncio.AbstractEventLoop | None]] = {} # key -> (client, event loop)
+
+
+    @classmethod
+    def get[C](cls, key: Hashable, factory: Callable[[], C]) -> C:
+        """Get the client of the key, created with `factory` if it does not exist on the running event loop."""
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if (entry := cls._clients.get(key)) is not None:
+            client, client_loop = entry
+
+            if client_loop is None or loop is None or client_loop is loop:
+                if client_loop is None and loop is not None:
+                    cls._clients[key] = (client, loop)
+                return client
+
+            # The connections of the old event loop can not be used anymore
+            del cls._clients[key]
+            cls._close_on(client_loop, key, client)
+
+        client = factory()
+        cls._clients[key] = (client, loop)
+
+        for callback in cls.on_create:
+            callback(key, client)
+
+        return client
+
+
+    @classmethod
+    def limits(cls) -> httpx.Limits:
+
+        return httpx.Limits(
+            max_connections=cls.max_connections,
+            max_keepalive_connections=cls.max_keepalive_connections,
+            keepalive_expiry=cls.keepalive_expiry,
+        )
+
+
+    @classmethod
+    def create_http_client(cls, **options: Any) -> httpx.AsyncClient:
+        """Create a `httpx.AsyncClient` with the pool settings. `options` override the settings."""
+
+        options.setdefault("limits", cls.limits())
+        options.setdefault("timeout", httpx.Timeout(cls.timeout, connect=cls.connect_timeout))
+        options.setdefault("http2", cls.http2)
+
+        return httpx.AsyncClient(**options)
+
+
+    @classmethod
+    def http_client(cls) -> httpx.AsyncClient:
+        """Get the shared client for plain HTTP requests, e.g. downloads."""
+
+        return cls.get(("http",), lambda: cls.create_http_client(follow_redirects=True))
+
+
+    @classmethod
+    async def release(cls, key: Hashable) -> None:
+        """Close and forget the client of the key."""
+
+        if (entry := cls._clients.pop(key, None)) is not None:
+            await cls._close_client(key, entry[0])
+
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Close all clients."""
+
+        clients = list(cls._clients.items())
+        cls._clients.clear()
+
+        await asyncio.gather(*(cls._close_client(key, client) for key, (client, _) in clients))
+
+
+    @classmethod
+    async def _close_client(cls, key: Hashable, client: Any) -> None:
+
+        for callback in cls.on_close:
+            callback(key, client)
+
+        close = getattr(client, "aclose", None) or getattr(client, "close", None)
+
+        if close is None:
+            return
+
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+        except Exception as e:
+            print(f"Error closing client {key}: {e}")
+
+
+    @classmethod
+    def _close_on(cls, loop: asyncio.AbstractEventLoop, key: Hashable, client: Any) -> None:
+        """Close a client on its own event loop, if it is still running."""
+
+        if loop.is_closed() or not loop.is_running():
+            return
+
+        asyncio.run_coroutine_threadsafe(cls._close_client(key, client), loop)
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from collections.abc import Iterable
+import asyncio
+import base64
+import io
+
+from .clients import HTTPClientManager
+
+
+class ImageInliner:
+    """Process-wide LRU cache of remote images, for providers that do not accept image URLs.
+
+    Images are downloaded concurrently over the shared HTTP client of the `HTTPClientManager` and cached by URL as base64,
+    so an image of an earlier turn is not downloaded again. Concurrent requests for the same URL share one download.
+
+    Images larger than `max_inline_bytes` or `max_dimension` are downscaled and re-encoded as JPEG, which requires Pillow.
+
+    Attributes:
+        max_cache_bytes: The maximum size of the cached base64 data.
+        max_download_bytes: The maximum size of a downloaded image. Larger images are skipped.
+        max_inline_bytes: The maximum size of an inlined image before it is downscaled. `None` disables the limit.
+        max_dimension: The maximum width and height of an inlined image. `None` disables the limit.
+        jpeg_quality: The quality of re-encoded images.
+    """
+
+    max_cache_bytes: int = 64 * 1024 * 1024
+    max_download_bytes: int = 20 * 1024 * 1024
+    max_inline_bytes: int | None = 4 * 1024 * 1024
+    max_dimension: int | None = None
+    jpeg_quality: int = 85
+
+    _cache: OrderedDict[str, tuple[str, str]] = OrderedDict() # url -> (mime type, base64 data)
+    _cache_bytes: int = 0
+    _pending: dict[str, asyncio.Task[tuple[str, str] | None]] = {}
+
+    SIGNATURES: dict[bytes, str] = {
+        b"\x89PNG\r\n\x1a\n": "image/png",
+        b"\xff\xd8\xff": "image/jpeg",
+        b"GIF87a": "image/gif",
+        b"GIF89a": "image/gif",
+        b"BM": "image/bmp",
+    }
+
+
+    @classmethod
+    def is_remote(cls, url: str) -> bool:
+
+        return url.strip().startswith(("http://", "https://"))
+
+
+    @classmethod
+    async def inline(cls, urls: Iterable[str]) -> dict[str, str]:
+        """Get the data URLs of the remote URLs. URLs that can not be downloaded are missing in the result."""
+
+        remote = list(dict.fromkeys(url for url in urls if cls.is_remote(url)))
+        images = await asyncio.gather(*(cls.get(url) for url in remote))
+
+        data_urls: dict[str, str] = {}
+
+        for url, image in zip(remote, images):
+            if image is not None:
+                mime_type, data = image
+                data_urls[url] = f"data:{mime_type};base64,{data}"
+
+        return data_urls
+
+
+    @classmethod
+    async def get(cls, url: str) -> tuple[str, str] | None:
+        """Get the MIME type and base64 data of the image, or `None` if it can not be downloaded."""
+
+        if (image := cls._cache.get(url)) is not None:
+            cls._cache.move_to_end(url)
+            return image
+
+        if (task := cls._pending.get(url)) is None or task.get_loop() is not asyncio.get_running_loop():
+            task = cls._pending[url] = asyncio.create_task(cls._load(url))
+
+        return await asyncio.shield(task)
+
+
+    @classmethod
+    async def fetch(cls, url: str) -> tuple[bytes, str]:
+        """Download the image and detect its MIME type."""
+
+        client = HTTPClientManager.http_client()
+
+        async with client.stream("GET", url.strip()) as response:
+            response.raise_for_status()
+
+            if int(response.headers.get("content-length") or 0) > cls.max_download_bytes:
+                raise ValueError(f"Image is larger than {cls.max_download_bytes} bytes")
+
+            data = bytearray()
+            async for part in response.aiter_bytes():
+                data += part
+                if len(data) > cls.max_download_bytes:
+                    raise ValueError(f"Image is larger than {cls.max_download_bytes} bytes")
+
+        return bytes(data), cls.detect_mime_type(bytes(data[:16]), response.headers.get("content-type"))
+
+
+    @classmethod
+    def detect_mime_type(cls, header: bytes, content_type: str | None = None) -> str:
+        """Detect the MIME type from the first bytes of the image, falling back to the content type of the response."""
+
+        for signature, mime_type in cls.SIGNATURES.items():
+            if header.startswith(signature):
+                return mime_type
+
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return "image/webp"
+
+        if content_type and content_type.split(";")[0].strip().startswith("image/"):
+            return content_type.split(";")[0].strip()
+
+        raise ValueError("Unknown image type")
+
+
+    @classmethod
+    def shrink(cls, data: bytes, mime_type: str) -> tuple[bytes, str]:
+        """Downscale and re-encode the image if it exceeds `max_inline_bytes` or `max_dimension`."""
+
+        too_large = cls.max_inline_bytes is not None and len(data) > cls.max_inline_bytes
+
+        if not too_large and cls.max_dimension is None:
+            return data, mime_type
+
+        try:
+            from PIL import Image # type: ignore
+        except ImportError:
+            if too_large:
+                raise ValueError(f"Image is larger than {cls.max_inline_bytes} bytes and Pillow is not installed")
+            return data, mime_type
+
+        with Image.open(io.BytesIO(data)) as image:
+
+            dimension = cls.max_dimension or max(image.size)
+
+            if not too_large and max(image.size) <= dimension:
+                return data, mime_type
+
+            while True:
+                resized = image.convert("RGB")
+                resized.thumbnail((dimension, dimension))
+
+                buffer = io.BytesIO()
+                resized.save(buffer, format="JPEG", quality=cls.jpeg_quality)
+
+                if cls.max_inline_bytes is None or buffer.tell() <= cls.max_inline_bytes or dimension <= 256:
+                    return buffer.getvalue(), "image/jpeg"
+
+                dimension = int(min(dimension, max(resized.size)) * 0.75)
+
+
+    @classmethod
+    def clear(cls) -> None:
+
+        cls._cache.clear()
+        cls._cache_bytes = 0
+
+
+    @classmethod
+    async def _load(cls, url: str) -> tuple[str, str] | None:
+
+        try:
+            data, mime_type = await cls.fetch(url)
+            data, mime_type = await asyncio.to_thread(cls.shrink, data, mime_type)
+
+        except Exception as e:
+            print(f"Error downloading image from URL {url}: {e}")
+            return None
+
+        finally:
+            if cls._pending.get(url) is asyncio.current_task():
+                del cls._pending[url]
+
+        image = (mime_type, base64.b64encode(data).decode("ascii"))
+
+        if (replaced := cls._cache.pop(url, None)) is not None:
+            cls._cache_bytes -= len(replaced[1])
+
+        cls._cache[url] = image
+        cls._cache_bytes += len(image[1])
+
+        while cls._cache_bytes > cls.max_cache_bytes and len(cls._cache) > 1:
+            _, evicted = cls._cache.popitem(last=False)
+            cls._cache_bytes -= len(evicted[1])
+
+        return image
@@ -1,8 +1,8 @@
 from collections.abc import Sequence
-from typing import Literal
-import requests
+from typing import Any, Literal
+import asyncio
 import uuid
-import base64
+import httpx
 from ollama import (
     AsyncClient,
     Image,
@@ -13,28 +13,68 @@ from llmir.adapter import OllamaAdapter
 
 from ...core.states import SharedProtocol, StateProtocol
 from ...core.nodes import LLMNode
+from ...core.clients import HTTPClientManager
+from ...core.images import ImageInliner
 from .utils.streams import OllamaStream
 
 class LLMOllamaNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedProtocol](LLMNode[T, S]):
+    """LLM Node for the native Ollama API.
 
-    dependencies = {"ollama", "llmir"}
+    The `AsyncClient` is shared by all nodes with the same host and client options through the `HTTPClientManager`,
+    so the connection to Ollama stays alive across node instances.
+    Remote images are downloaded concurrently by the `ImageInliner` and share its cache with the other provider nodes.
 
-    def __init__(self, model: str, stream: bool = False, think: bool | Literal["low", "medium", "high"] | None = None, keep_alive: str | None = None, generate_unique_tool_call_ids: bool = False) -> None:
+    Args:
+        model: The model to use.
+        stream: Whether to enable streaming.
+        think: Whether or how much the model should think.
+        keep_alive: How long the model stays loaded in Ollama.
+        generate_unique_tool_call_ids: Whether to generate unique tool call IDs instead of using the tool name.
+        host: The host of the Ollama API, `None` uses `OLLAMA_HOST` or the local default.
+        client_options: Extra keyword arguments for the `AsyncClient`, e.g. `headers` or `timeout`.
+    """
+
+    dependencies = {"ollama", "llmir", "httpx"}
+
+    host: str | None
+    client_options: dict[str, Any]
+
+    def __init__(self, model: str, stream: bool = False, think: bool | Literal["low", "medium", "high"] | None = None, keep_alive: str | None = None, generate_unique_tool_call_ids: bool = False, host: str | None = None, client_options: dict[str, Any] | None = None) -> None:
         super().__init__(model, stream)
         self.keep_alive = keep_alive
         self.think: bool | Literal["low", "medium", "high"] | None = think
         self.generate_unique_tool_call_ids = generate_unique_tool_call_ids
+        self.host = host
+        self.client_options = client_options or {}
+
+
+    @property
+    def client(self) -> AsyncClient:
+        """The shared client of the host and client options."""
+
+        key = ("ollama", self.host, repr(sorted(self.client_options.items())))
+
+        return HTTPClientManager.get(key, self.create_client)
+
+
+    def create_client(self) -> AsyncClient:
+
+        options = {
+            "limits": HTTPClientManager.limits(),
+            "timeout": httpx.Timeout(HTTPClientManager.timeout, connect=HTTPClientManager.connect_timeout),
+            **self.client_options,
+        }
+
+        return AsyncClient(host=self.host, **options)
 
     async def __call__(self, state: StateProtocol, shared: SharedProtocol) -> None:
 
         chat = OllamaAdapter.chat(state.llm.messages)
         tools = OllamaAdapter.tools(state.llm.tools)
 
-        for message in chat:
-            if message.images:
-                await self.download_remote_image_urls(message.images)
+        await self.download_remote_image_urls([image for message in chat for image in message.images or []])
         
-        response = await AsyncClient().chat( # type: ignore
+        response = await self.client.chat( # type: ignore
             model=self.model,
             stream=self.stream,
             keep_alive=self.keep_alive,
@@ -87,10 +127,11 @@ class LLMOllamaNode[T: StateProtocol = StateProtocol, S: SharedProtocol = Shared
 
 
     async def download_remote_image_urls(self, images: Sequence[Image]) -> None:
+        """Replace the remote image URLs with the base64 data of the images, downloaded concurrently."""
 
-        for image in images:
+        remote = [image for image in images if isinstance(image.value, str) and ImageInliner.is_remote(image.value)]
+        downloads = await asyncio.gather(*(ImageInliner.get(image.value) for image in remote)) # type: ignore
 
-            if isinstance(image.value, str) and image.value.startswith("http"):
-                print(f"Downloading image from {image.value}")
-                response = requests.get(image.value)
-                image.value = f"data:image/jpeg;base64,{base64.b64encode(response.content).decode('utf-8')}"
\ No newline at end of file
+        for image, download in zip(remote, downloads):
+            if download is not None:
+                _, image.value = download
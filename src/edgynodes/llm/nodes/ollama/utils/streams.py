@@ -1,13 +1,19 @@
+from collections import deque
 from typing import AsyncIterator
 from types import TracebackType
 import uuid
 from ollama import ChatResponse
 from llmir import AIChunkText, AIChunks, AIChunkToolCall
-from rich import print as rprint
 from ....core.streams import LLMStream
 
 
 class OllamaStream(LLMStream):
+    """Stream of an Ollama chat response.
+
+    A response chunk can contain text and several tool calls. They are kept in a pending buffer
+    and yielded one by one in order, the text first, so no tool call is dropped.
+    """
+
     iterator: AsyncIterator[ChatResponse]
 
     def __init__(self, iterator: AsyncIterator[ChatResponse], generate_unique_tool_call_ids: bool = False) -> None:
@@ -15,36 +21,36 @@ class OllamaStream(LLMStream):
         self.iterator = iterator
         self.generate_unique_tool_call_ids = generate_unique_tool_call_ids
 
+        self._pending: deque[AIChunks] = deque()
+
     async def __anext__(self) -> AIChunks:
         if self.abort.is_set():
             print("Aborting Stream")
             raise StopAsyncIteration
 
         chunk: ChatResponse
-        while True:
-            try:
-                chunk = await self.iterator.__anext__()
-            except StopAsyncIteration:
-                raise StopAsyncIteration
+        while not self._pending:
+            chunk = await self.iterator.__anext__()
 
             message = chunk.message
 
+            if message.content:
+                self._pending.append(AIChunkText(text=message.content))
+
             # Tool calls kommen bei Ollama vollständig in einem Chunk an –
             # kein Akkumulieren nötig wie bei OpenAI.
-            if message.tool_calls:
-                rprint("Received tool call: ", message.tool_calls)
-                tool_call = message.tool_calls[0]
-                return AIChunkToolCall(
-                    id=f"{tool_call.function.name}_{uuid.uuid4()}" if self.generate_unique_tool_call_ids else tool_call.function.name,
-                    name=tool_call.function.name,
-                    arguments=dict(tool_call.function.arguments),
+            for tool_call in message.tool_calls or []:
+                self._pending.append(
+                    AIChunkToolCall(
+                        id=f"{tool_call.function.name}_{uuid.uuid4()}" if self.generate_unique_tool_call_ids else tool_call.function.name,
+                        name=tool_call.function.name,
+                        arguments=dict(tool_call.function.arguments),
+                    )
                 )
 
-            if message.content:
-                return AIChunkText(text=message.content)
+            # Leere Chunks (z.B. done-Marker) werden übersprungen
 
-            # Leere Chunks (z.B. done-Marker) überspringen
-            continue
+        return self._pending.popleft()
 
     async def __aexit__(
         self,
@@ -1,3 +1,4 @@
+from typing import Any
 from ...core.supports import Supports
 from .openai import LLMOpenAINode
 
@@ -8,5 +9,5 @@ class LLMGeminiNode(LLMOpenAINode):
         remote_image_urls=False
     )
 
-    def __init__(self, model: str, api_key: str, base_url: str ="https://generativelanguage.googleapis.com/v1beta/openai/", stream: bool = False, extra_body: dict[str, object] | None = None) -> None:
-        super().__init__(model=model, api_key=api_key, base_url=base_url,stream=stream, extra_body=extra_body)
\ No newline at end of file
+    def __init__(self, model: str, api_key: str, base_url: str ="https://generativelanguage.googleapis.com/v1beta/openai/", stream: bool = False, extra_body: dict[str, object] | None = None, client_options: dict[str, Any] | None = None) -> None:
+        super().__init__(model=model, api_key=api_key, base_url=base_url,stream=stream, extra_body=extra_body, client_options=client_options)
\ No newline at end of file
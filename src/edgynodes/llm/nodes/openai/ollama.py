@@ -1,3 +1,4 @@
+from typing import Any
 from .openai import LLMOpenAINode
 from ...core.supports import Supports
 
@@ -6,18 +7,20 @@ class LLMOllamaNode(LLMOpenAINode):
     """
     LLM Node for Ollama.
 
-    *Note*: Multiple tool calls per response when streaming is enabled are not handled correctly by the Ollama API.
+    Uses the OpenAI compatible API of Ollama. For the native API, see `edgynodes.llm.nodes.ollama.LLMOllamaNode`.
 
     Args:
         model: The model to use.
         api_key: The API key is ommited with the value "ollama".
         base_url: The base URL to use, defaulting to the standard local Ollama API URL.
-        enable_streaming: Whether to enable streaming.
+        stream: Whether to enable streaming.
+        extra_body: Extra fields for the request body.
+        client_options: Extra keyword arguments for the shared `AsyncOpenAI` client.
     """
 
     supports: Supports = Supports(
         remote_image_urls=False,
     )
 
-    def __init__(self, model: str, api_key: str = "ollama", base_url: str ="http://localhost:11434/v1", stream: bool = False, extra_body: dict[str, object] | None = None) -> None:
-        super().__init__(model=model, api_key=api_key, base_url=base_url, stream=stream, extra_body=extra_body)
\ No newline at end of file
+    def __init__(self, model: str, api_key: str = "ollama", base_url: str ="http://localhost:11434/v1", stream: bool = False, extra_body: dict[str, object] | None = None, client_options: dict[str, Any] | None = None) -> None:
+        super().__init__(model=model, api_key=api_key, base_url=base_url, stream=stream, extra_body=extra_body, client_options=client_options)
\ No newline at end of file
@@ -1,29 +1,85 @@
 from llmir import AIMessages, AIMessage, AIChunkText, AIChunkImageURL, AIChunks, AIRoles, AITool, AIChunkToolCall
 from llmir.adapter import OpenAIAdapter
-from openai import AsyncOpenAI, AsyncStream
+from openai import AsyncOpenAI, AsyncStream, DefaultAsyncHttpxClient
 from openai.types.chat import ChatCompletionChunk, ChatCompletionFunctionToolParam, ChatCompletion, ChatCompletionMessageParam
 import json
-import requests
-import base64
+import httpx
+from typing import Any
 
 from ...core.states import StateProtocol, SharedProtocol
 from ...core.nodes import LLMNode
+from ...core.clients import HTTPClientManager
+from ...core.images import ImageInliner
 from .utils.streams import OpenAIStream
 
 
 
 class LLMOpenAINode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedProtocol](LLMNode[T, S]):
 
-    dependencies = {"llmir", "openai"}
+    """LLM Node for OpenAI compatible APIs.
 
-    client: AsyncOpenAI
+    The `AsyncOpenAI` client is shared by all nodes with the same base URL, API key and client options.
+    It is kept in the `HTTPClientManager`, so its connections stay alive across node instances.
+    Assign `client` to use an own client for a node.
+
+    Args:
+        model: The model to use.
+        api_key: The API key.
+        base_url: The base URL of the API.
+        stream: Whether to enable streaming.
+        extra_body: Extra fields for the request body.
+        client_options: Extra keyword arguments for the `AsyncOpenAI` client, e.g. `max_retries` or `default_headers`.
+    """
+
+    dependencies = {"llmir", "openai", "httpx"}
+
+    api_key: str
+    base_url: str
     extra_body: dict[str, object] | None
+    client_options: dict[str, Any]
 
-    def __init__(self, model: str, api_key: str, base_url: str = "https://api.openai.com/v1", stream: bool = False, extra_body: dict[str, object] | None = None) -> None:
+    def __init__(self, model: str, api_key: str, base_url: str = "https://api.openai.com/v1", stream: bool = False, extra_body: dict[str, object] | None = None, client_options: dict[str, Any] | None = None) -> None:
         super().__init__(model, stream)
 
-        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.api_key = api_key
+        self.base_url = base_url
         self.extra_body = extra_body
+        self.client_options = client_options or {}
+        self._client: AsyncOpenAI | None = None
+
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The shared client of the base URL, API key and client options, or the client assigned to this node."""
+
+        if self._client is not None:
+            return self._client
+
+        key = ("openai", self.base_url, self.api_key, repr(sorted(self.client_options.items())))
+
+        return HTTPClientManager.get(key, self.create_client)
+
+
+    @client.setter
+    def client(self, client: AsyncOpenAI | None) -> None:
+        """Use the client for this node instead of the shared one. `None` returns to the shared client."""
+
+        self._client = client
+
+
+    def create_client(self) -> AsyncOpenAI:
+        """Create the client with the pool settings of the `HTTPClientManager`. An `http_client` in the client options replaces the pooled one."""
+
+        options = dict(self.client_options)
+
+        if "http_client" not in options:
+            options["http_client"] = DefaultAsyncHttpxClient(
+                limits=HTTPClientManager.limits(),
+                timeout=httpx.Timeout(HTTPClientManager.timeout, connect=HTTPClientManager.connect_timeout),
+                http2=HTTPClientManager.http2,
+            )
+
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, **options)
 
 
     async def __call__(self, state: T, shared: S) -> None:
@@ -34,7 +90,7 @@ class LLMOpenAINode[T: StateProtocol = StateProtocol, S: SharedProtocol = Shared
 
             response: ChatCompletion = await self.client.chat.completions.create(
                 model=self.model,
-                messages=self.format_messages(chat),
+                messages=await self.format_messages(chat),
                 tools=self.format_tools(state.llm.tools),
                 extra_body=self.extra_body,
             )
@@ -50,7 +106,7 @@ class LLMOpenAINode[T: StateProtocol = StateProtocol, S: SharedProtocol = Shared
 
             stream: AsyncStream[ChatCompletionChunk] = await self.client.chat.completions.create(
                 model=self.model,
-                messages=self.format_messages(chat),
+                messages=await self.format_messages(chat),
                 tools=self.format_tools(state.llm.tools),
                 stream=True
             )
@@ -95,28 +151,39 @@ class LLMOpenAINode[T: StateProtocol = StateProtocol, S: SharedProtocol = Shared
         return OpenAIAdapter.tools(tools)
 
     
-    def format_messages(self, messages: list[AIMessages]) -> list[ChatCompletionMessageParam]:
+    async def format_messages(self, messages: list[AIMessages]) -> list[ChatCompletionMessageParam]:
+        """Convert the messages to the OpenAI format.
+
+        If the provider does not support remote image URLs, the images are inlined as data URLs by the `ImageInliner`.
+        The messages are copied and not modified, so the history keeps the original URLs.
+        """
 
         if not self.supports.remote_image_urls:
 
-            for msg in messages:
-                if isinstance(msg, AIMessage):
-                    for chunk in msg.chunks:
-                        if isinstance(chunk, AIChunkImageURL) and chunk.url.strip().startswith("http"):
-                            try:
-                                response = requests.get(chunk.url)
-                                # print(len(response.content))
-                                response.raise_for_status()
-                                image_data = response.content
-                                mime_type = response.headers.get('content-type', '')
-                                if not mime_type:
-                                    raise ValueError("Unknown MIME type")
-                                # print(mime_type)
-                                base64_data = base64.b64encode(image_data).decode('utf-8')
-                                chunk.url = f"data:{mime_type};base64,{base64_data}"
-                            except Exception as e:
-                                print(f"Error downloading image from URL {chunk.url}: {e}")
+            data_urls = await ImageInliner.inline(
+                chunk.url
+                for msg in messages
+                for chunk in msg.chunks
+                if isinstance(chunk, AIChunkImageURL)
+            )
+
+            messages = [self.replace_image_urls(msg, data_urls) for msg in messages]
 
         formatted = OpenAIAdapter.chat(messages)
         # rprint(formatted)
-        return formatted
\ No newline at end of file
+        return formatted
+
+
+    @classmethod
+    def replace_image_urls[M: AIMessages](cls, message: M, urls: dict[str, str]) -> M:
+        """Get a copy of the message with the image URLs replaced, or the message itself if it has none."""
+
+        if not any(isinstance(chunk, AIChunkImageURL) and chunk.url in urls for chunk in message.chunks):
+            return message
+
+        chunks = [
+            chunk.model_copy(update={"url": urls[chunk.url]}) if isinstance(chunk, AIChunkImageURL) and chunk.url in urls else chunk
+            for chunk in message.chunks
+        ]
+
+        return message.model_copy(update={"chunks": chunks})
@@ -1,22 +1,22 @@
-from typing import TypedDict
+from collections import deque
 from types import TracebackType
 from openai.types.chat import ChatCompletionChunk
 from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
 from openai import AsyncStream
 from llmir import AIChunkText, AIChunks, AIChunkToolCall
-import json
-from rich import print as rprint
 
 from ....core.streams import LLMStream
-
-
-class ToolCallDict(TypedDict):
-    id: str
-    name: str
-    arguments: str
+from .tool_calls import ToolCallBuffer
 
 
 class OpenAIStream(LLMStream):
+    """Stream of an OpenAI chat completion.
+
+    Tool call arguments are collected in `ToolCallBuffer`s. A tool call is emitted as soon as its arguments are complete
+    and the next tool call index starts, so tool execution can overlap with the rest of the stream.
+    The remaining tool calls are emitted at the end of the stream. Tool calls are emitted in index order.
+    A new tool call id on the index of a complete tool call starts a new tool call.
+    """
 
 
     def __init__(self, iterator: AsyncStream[ChatCompletionChunk]) -> None:
@@ -24,7 +24,8 @@ class OpenAIStream(LLMStream):
         
         self.iterator = iterator
 
-        self._tool_calls: dict[int, ToolCallDict] = {}
+        self._tool_calls: dict[int, ToolCallBuffer] = {}
+        self._pending: deque[AIChunks] = deque()
 
     async def __anext__(self) -> AIChunks:
 
@@ -32,52 +33,40 @@ class OpenAIStream(LLMStream):
             print("Aborting Stream")
             raise StopAsyncIteration
 
-        formatted: AIChunks | None = None
-
         chunk: ChatCompletionChunk
 
-        while not formatted:
+        while not self._pending:
             
             try:
                 chunk = await self.iterator.__anext__()
             
             except StopAsyncIteration:
 
-                # Return next remaining tool call if any
-                if self._tool_calls:
-                    lowest_index = min(self._tool_calls)
-                    tool_call_dict = self._tool_calls.pop(lowest_index)
-
-                    try:
-                        arguments = json.loads(tool_call_dict["arguments"])
-                    except json.JSONDecodeError as e:
-                        e.add_note(f"Tried to parse: {tool_call_dict["arguments"]}")
-                        raise e
+                # Return the remaining tool calls
+                for index in sorted(self._tool_calls):
+                    self._pending.append(self.format_tool_call(self._tool_calls.pop(index)))
 
+                if not self._pending:
+                    raise StopAsyncIteration
 
-                    return AIChunkToolCall(
-                        id=tool_call_dict["id"],
-                        name=tool_call_dict["name"],
-                        arguments=arguments,
-                    )
+                break
 
-                raise StopAsyncIteration
+            if not chunk.choices:
+                continue
             
             delta = chunk.choices[0].delta
 
-            if delta.content:
-                formatted = AIChunkText(
-                    text=delta.content
-                )
-            
-                
             if delta.tool_calls:
-                rprint("Received tool call delta: ", delta.tool_calls)
                 self.integrate_tool_calls(delta.tool_calls)
 
-                        
+            if delta.content:
+                self._pending.append(
+                    AIChunkText(
+                        text=delta.content
+                    )
+                )
                 
-        return formatted
+        return self._pending.popleft()
     
 
     def integrate_tool_calls(self, tool_calls: list[ChoiceDeltaToolCall]) -> None:
@@ -86,27 +75,52 @@ class OpenAIStream(LLMStream):
 
             if tool_call.index not in self._tool_calls:
                 
-                self._tool_calls[tool_call.index] = ToolCallDict(
-                    id="",
-                    name="",
-                    arguments="",
-                )
+                self._tool_calls[tool_call.index] = ToolCallBuffer()
             
-            elif tool_call.id and self._tool_calls[tool_call.index]["id"] and self._tool_calls[tool_call.index]["id"] != tool_call.id:
-                raise ValueError(f"Conflicting tool call ids for index {tool_call.index}: {self._tool_calls[tool_call.index]['id']} and {tool_call.id}")
+            elif tool_call.id and self._tool_calls[tool_call.index].id and self._tool_calls[tool_call.index].id != tool_call.id:
+
+                if not self._tool_calls[tool_call.index].complete:
+                    raise ValueError(f"Conflicting tool call ids for index {tool_call.index}: {self._tool_calls[tool_call.index].id} and {tool_call.id}")
+
+                # Some servers (e.g. Ollama) send consecutive tool calls with the same index
+                self._pending.append(self.format_tool_call(self._tool_calls[tool_call.index]))
+                self._tool_calls[tool_call.index] = ToolCallBuffer()
 
             if tool_call.id:
-                self._tool_calls[tool_call.index]["id"] = tool_call.id
+                self._tool_calls[tool_call.index].id = tool_call.id
 
             if function := tool_call.function:
 
                 if function.name:
-                    self._tool_calls[tool_call.index]["name"] = function.name
+                    self._tool_calls[tool_call.index].name = function.name
 
                 if function.arguments:
-                    self._tool_calls[tool_call.index]["arguments"] += function.arguments
+                    self._tool_calls[tool_call.index].append(function.arguments)
+
+        self.emit_complete_tool_calls()
+
+
+    def emit_complete_tool_calls(self) -> None:
+        """Move the complete tool calls that are followed by a started tool call to the pending chunks, in index order."""
+
+        last_index = max(self._tool_calls, default=None)
+
+        for index in sorted(self._tool_calls):
+
+            if index == last_index or not self._tool_calls[index].complete:
+                break
+
+            self._pending.append(self.format_tool_call(self._tool_calls.pop(index)))
+
 
+    @classmethod
+    def format_tool_call(cls, tool_call: ToolCallBuffer) -> AIChunkToolCall:
 
+        return AIChunkToolCall(
+            id=tool_call.id,
+            name=tool_call.name,
+            arguments=tool_call.parse_arguments(),
+        )
         
     
     async def __aexit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
@@ -0,0 +1,102 @@
+from typing import Any
+import json
+import re
+
+
+class ToolCallBuffer:
+    """Buffer of a streamed tool call.
+
+    The argument fragments are collected in a list and joined once, so long arguments are not copied on every delta.
+    Each fragment is scanned once for the brackets and strings of the JSON value, so the buffer knows when the arguments are complete
+    without parsing them.
+
+    Attributes:
+        id: The id of the tool call.
+        name: The name of the tool.
+        fragments: The argument fragments.
+        complete: Whether the top-level JSON value of the arguments is closed.
+    """
+
+    _tokens = re.compile(r'[{}\[\]"\\]')
+
+    id: str
+    name: str
+    fragments: list[str]
+    complete: bool
+
+    def __init__(self) -> None:
+        self.id = ""
+        self.name = ""
+        self.fragments = []
+        self.complete = False
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+
+    def append(self, fragment: str) -> None:
+        """Add an argument fragment and update the completeness."""
+
+        self.fragments.append(fragment)
+
+        if self.complete:
+            return
+
+        skip_to = 0
+
+        if self._escape: # The escaped character is the first of this fragment
+            self._escape = False
+            skip_to = 1
+
+        for match in self._tokens.finditer(fragment, skip_to):
+
+            position = match.start()
+
+            if position < skip_to:
+                continue
+
+            token = match.group()
+
+            if self._in_string:
+                if token == "\\":
+                    if position + 1 < len(fragment):
+                        skip_to = position + 2
+                    else:
+                        self._escape = True
+                elif token == '"':
+                    self._in_string = False
+
+            elif token == '"':
+                self._in_string = True
+
+            elif token in "{[":
+                self._depth += 1
+
+            elif token in "}]":
+                self._depth -= 1
+
+                if self._depth == 0:
+                    self.complete = True
+                    return
+
+
+    @property
+    def arguments(self) -> str:
+
+        return "".join(self.fragments)
+
+
+    def parse_arguments(self) -> dict[str, Any]:
+        """Parse the joined arguments. Empty arguments are an empty object."""
+
+        arguments = self.arguments
+
+        if not arguments.strip():
+            return {}
+
+        try:
+            return json.loads(arguments)
+        except json.JSONDecodeError as e:
+            e.add_note(f"Tried to parse: {arguments}")
+            raise e
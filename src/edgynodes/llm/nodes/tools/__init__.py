@@ -1,15 +1,27 @@
-from .core import AddToolsNode, AddMCPToolsNode, ExtractNewToolCallsNode, GetNextToolCallResultNode, IntegrateToolResultsNode, IntegrateMCPToolResultsNode
+from .core import AddToolsNode, AddMCPToolsNode, ExtractNewToolCallsNode, GetNextToolCallResultNode, ExecuteToolCallsConcurrentlyNode, IntegrateToolResultsNode, IntegrateMCPToolResultsNode
 from .utils.context import ToolContext
 from .utils.functions import MCPToolFunction
+from .utils.sessions import MCPSession, MCPSessionManager
+from .utils.catalog import MCPToolCatalog
+from .utils.registry import ToolRegistry, ToolSignature, tool
+from .utils.timeout_error import ToolCallTimeoutError
 
 __all__ = [
     "AddToolsNode",
     "AddMCPToolsNode",
     "ExtractNewToolCallsNode",
     "GetNextToolCallResultNode",
+    "ExecuteToolCallsConcurrentlyNode",
     "IntegrateToolResultsNode", 
     "IntegrateMCPToolResultsNode",
 
     "ToolContext",
     "MCPToolFunction",
+    "MCPSession",
+    "MCPSessionManager",
+    "MCPToolCatalog",
+    "ToolRegistry",
+    "ToolSignature",
+    "tool",
+    "ToolCallTimeoutError",
 ]
@@ -1,15 +1,15 @@
 from llmir import AIRoles, AIChunkText, AIChunkFile, AIChunkToolCall, AIMessageToolResponse, AIChunks
 import llmir
 from edgygraph import Node
-from typing import Any, Callable, Tuple, cast, overload
-from pydantic import Field, create_model, BaseModel
-from docstring_parser import parse
+from typing import Any, Callable, Tuple, overload
 from rich import print as rprint
 from datetime import datetime
 import json
 import inspect
+import asyncio
 import mcp
 import fastmcp
+from fastmcp.client.transports import ClientTransport
 import base64
 import mimetypes
 
@@ -17,6 +17,10 @@ import mimetypes
 from ...core.states import StateProtocol, SharedProtocol
 from .utils.context import ToolContext
 from .utils.functions import MCPToolFunction
+from .utils.registry import ToolRegistry
+from .utils.timeout_error import ToolCallTimeoutError
+from .utils.sessions import MCPSession, MCPSessionManager, MCPTarget
+from .utils.catalog import MCPToolCatalog
     
 
 class AddToolsNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedProtocol](Node[T, S]):
@@ -53,40 +57,9 @@ class AddToolsNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedP
             if function.__name__ in tools:
                 raise Exception(f"Duplicate function name: {function.__name__}")
 
-            doc = parse(function.__doc__ or "")
-            param_descriptions = {p.arg_name: p.description for p in doc.params}
-
-            signature = inspect.signature(function)
-            fields = {}
-
-            for name, param in signature.parameters.items():
-
-                # Skip *args or **kwargs and context parameters
-                if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD) or ToolContext.is_context_param(param):
-                    continue
-
-                print(param)
-
-                annotation = param.annotation if param.annotation is not inspect.Parameter.empty else Any
-                default = ... if param.default is inspect.Parameter.empty else param.default
-
-                fields[name] = (
-                    annotation, 
-                    Field(
-                        default=default,
-                        description=param_descriptions.get(name, "")
-                    )
-                )
-
-            dynamic_model: type[BaseModel] = create_model(function.__name__, **cast(dict[str, Any], fields))
-
             tools[function.__name__] = (
                 function,
-                llmir.AITool(
-                    name=function.__name__,
-                    description=doc.description or "",
-                    input_schema=dynamic_model.model_json_schema(),
-                )
+                ToolRegistry.tool(function),
             )
         
         return tools
@@ -95,42 +68,72 @@ class AddToolsNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedP
 
 
 class AddMCPToolsNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedProtocol](Node[T, S]):
+    """Add the tools of an MCP server to the state.
+
+    The connection to the server is a persistent `MCPSession` from the `MCPSessionManager`.
+    It is shared with all tool calls and all graph runs using the same server, even if a new transport is created for every run.
+    Pass client handlers like `log_handler` as `client_options`, a ready-made `fastmcp.Client` is rejected.
+
+    The formatted tool list is cached in the `MCPToolCatalog` for `cache_ttl` seconds.
+
+    Attributes:
+        session: The session of the MCP server.
+        cache_ttl: The time in seconds the tool list is cached. `0` disables the cache.
+    """
 
-    client: fastmcp.Client[Any]
+    session: MCPSession
+    cache_ttl: float
 
     @overload
-    def __init__(self, client: fastmcp.Client[Any], /) -> None: ...
+    def __init__(self, url: str, /, cache_ttl: float = 300, client_options: dict[str, Any] | None = None) -> None: ...
 
     @overload
-    def __init__(self, url: str, /) -> None: ...
+    def __init__(self, transport: ClientTransport, /, cache_ttl: float = 300, client_options: dict[str, Any] | None = None) -> None: ...
+
+    @overload
+    def __init__(self, session: MCPSession, /, cache_ttl: float = 300, client_options: dict[str, Any] | None = None) -> None: ...
 
 
-    def __init__(self, target: str | fastmcp.Client[Any]) -> None:
+    def __init__(self, target: MCPTarget | MCPSession, /, cache_ttl: float = 300, client_options: dict[str, Any] | None = None) -> None:
 
-        if isinstance(target, fastmcp.Client):
-            self.client = target
+        if isinstance(target, MCPSession):
+            self.session = target
         else:
-            self.client = fastmcp.Client(target)
+            self.session = MCPSessionManager.get(target, client_options)
+
+        self.cache_ttl = cache_ttl
+
+
+    @property
+    def client(self) -> fastmcp.Client[Any]:
+        return self.session.client
 
 
     async def __call__(self, state: T, shared: S) -> None:
         
-        async with self.client:
+        tools = MCPToolCatalog.get(self.session.key) if self.cache_ttl > 0 else None
 
-            tools: list[llmir.AITool] = self.format_tools(await self.client.list_tools())
+        if tools is None:
 
-            state.llm.tools.extend(tools)
+            async with self.session.connect() as client:
 
-            async with shared.lock:
-                for tool in tools:
-                    function = MCPToolFunction(
-                        tool,
-                        self.client,
-                    )
+                tools = self.format_tools(await client.list_tools())
+
+            if self.cache_ttl > 0:
+                MCPToolCatalog.set(self.session.key, tools, ttl=self.cache_ttl)
+
+        state.llm.tools.extend(tools)
+
+        async with shared.lock:
+            for tool in tools:
+                function = MCPToolFunction(
+                    tool,
+                    self.session,
+                )
 
-                    if tool.name in shared.llm.tool_functions:
-                        raise Exception(f"Tool with name \"{tool.name}\" already exists")
-                    shared.llm.tool_functions[tool.name] = function
+                if tool.name in shared.llm.tool_functions:
+                    raise Exception(f"Tool with name \"{tool.name}\" already exists")
+                shared.llm.tool_functions[tool.name] = function
 
     
     def format_tools(self, mcp_tools: list[mcp.types.Tool]) -> list[llmir.AITool]:
@@ -202,20 +205,24 @@ class GetNextToolCallResultNode[T: StateProtocol = StateProtocol, S: SharedProto
     async def run_function(self, state: T, shared: S, chunk: AIChunkToolCall) -> Any:
     
         func = shared.llm.tool_functions[chunk.name]
-        sig = inspect.signature(func)
+        sig = ToolRegistry.signature(func)
 
-        bound = sig.bind_partial(**chunk.arguments)
+        bound = sig.signature.bind_partial(**chunk.arguments)
 
         print(bound)
 
-        for name, param in sig.parameters.items():
+        for name in sig.context_params:
 
             if name in bound.arguments: # only use unbound parameters
                 continue
 
-            if ToolContext.is_context_param(param):
-                context = ToolContext(state, shared)
-                bound.arguments[name] = context
+            context = ToolContext(state, shared)
+            bound.arguments[name] = context
+
+        return await self.call_function(func, bound)
+
+
+    async def call_function(self, func: Callable[..., Any], bound: inspect.BoundArguments) -> Any:
 
         result = func(*bound.args, **bound.kwargs)
 
@@ -224,6 +231,123 @@ class GetNextToolCallResultNode[T: StateProtocol = StateProtocol, S: SharedProto
 
         return result
 
+
+
+class ExecuteToolCallsConcurrentlyNode[T: StateProtocol = StateProtocol, S: SharedProtocol = SharedProtocol](GetNextToolCallResultNode[T, S]):
+    """Execute all new tool calls at once instead of one per graph step.
+
+    The tool calls run concurrently, so the latency of a turn is the latency of the slowest call.
+    The results are appended to the shared state in the order of the original tool calls.
+    A call that fails or times out does not affect the other calls, its result is the error message from `format_error`.
+
+    Synchronous tool functions can be run in a worker thread. Functions that take a `ToolContext` always run on the event loop,
+    because they access the state and the asyncio lock of the shared state.
+
+    Attributes:
+        max_concurrency: The maximum number of tool calls running at the same time. `None` means no limit.
+        timeout: The timeout in seconds for each single tool call. `None` means no timeout.
+        offload_sync_functions: Whether to run synchronous tool functions without a `ToolContext` in a worker thread to not block the event loop.
+        raise_on_error: Whether to raise the errors of the failed calls after all results are stored.
+    """
+
+    max_concurrency: int | None
+    timeout: float | None
+    offload_sync_functions: bool
+    raise_on_error: bool
+
+    def __init__(self, max_concurrency: int | None = None, timeout: float | None = None, offload_sync_functions: bool = True, raise_on_error: bool = False) -> None:
+        super().__init__()
+
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.offload_sync_functions = offload_sync_functions
+        self.raise_on_error = raise_on_error
+
+
+    async def __call__(self, state: T, shared: S) -> None:
+
+        async with shared.lock:
+            chunks = shared.llm.new_tool_calls
+            shared.llm.new_tool_calls = []
+
+        if not chunks:
+            return
+
+        semaphore = asyncio.Semaphore(self.max_concurrency or len(chunks))
+        errors: list[Exception] = []
+
+
+        async def execute(chunk: AIChunkToolCall) -> Any:
+
+            async with semaphore:
+
+                rprint(f"Executing function {chunk.name}")
+
+                try:
+                    try:
+                        async with asyncio.timeout(self.timeout) as timeout:
+                            result = await self.run_function(state, shared, chunk)
+
+                    except TimeoutError as e:
+                        if self.timeout is None or not timeout.expired(): # Raised by the function itself
+                            raise
+
+                        raise ToolCallTimeoutError(chunk.name, self.timeout) from e
+
+                except ToolCallTimeoutError as e:
+                    errors.append(e)
+                    return self.format_error(chunk, e)
+
+                except Exception as e:
+                    e.add_note(f"Error execution function {chunk.name} with arguments {chunk.arguments}")
+                    errors.append(e)
+                    return self.format_error(chunk, e)
+
+                rprint(f"Executed function {chunk.name}")
+
+                return result
+
+
+        results = await asyncio.gather(*(execute(chunk) for chunk in chunks))
+
+        async with shared.lock:
+            shared.llm.new_tool_call_results.extend(zip(chunks, results))
+
+        if errors and self.raise_on_error:
+            raise ExceptionGroup("Tool calls failed", errors)
+
+
+    def format_error(self, chunk: AIChunkToolCall, error: Exception) -> str:
+        """Get the result of a failed tool call, which is passed to the model."""
+
+        rprint(f"Function {chunk.name} failed: {error!r}")
+
+        if isinstance(error, ToolCallTimeoutError):
+            return f"Error: {error}"
+
+        return f"Error: The function {chunk.name} failed with {type(error).__name__}: {error}"
+
+
+    async def call_function(self, func: Callable[..., Any], bound: inspect.BoundArguments) -> Any:
+
+        if self.offload_sync_functions and not self.is_async_callable(func) and not ToolRegistry.signature(func).context_params:
+            result = await asyncio.to_thread(func, *bound.args, **bound.kwargs)
+
+            if inspect.iscoroutine(result):
+                result = await result
+
+            return result
+
+        return await super().call_function(func, bound)
+
+
+    @classmethod
+    def is_async_callable(cls, func: Callable[..., Any]) -> bool:
+        return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
                     
 
 
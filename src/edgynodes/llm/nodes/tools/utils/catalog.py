@@ -0,0 +1,59 @@
+from typing import Hashable
+import time
+import llmir
+
+
+class MCPToolCatalog:
+    """Process-wide cache of the formatted tool lists of MCP servers.
+
+    The entries are keyed by the server identity (the `key` of the `MCPSession`) and expire after their TTL.
+    Sessions invalidate their entry when the server sends a `tools/list_changed` notification or the session reconnects.
+
+    Attributes:
+        hits: The number of lookups that were served from the cache.
+        misses: The number of lookups that were not in the cache or expired.
+    """
+
+    _entries: dict[Hashable, tuple[float, list[llmir.AITool]]] = {} # key -> (expiry, tools)
+
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def get(cls, key: Hashable) -> list[llmir.AITool] | None:
+
+        entry = cls._entries.get(key)
+
+        if entry is None or entry[0] <= time.monotonic():
+            cls._entries.pop(key, None)
+            cls.misses += 1
+            return None
+
+        cls.hits += 1
+        return list(entry[1])
+
+
+    @classmethod
+    def set(cls, key: Hashable, tools: list[llmir.AITool], ttl: float) -> None:
+
+        cls._entries[key] = (time.monotonic() + ttl, list(tools))
+
+
+    @classmethod
+    def invalidate(cls, key: Hashable | None = None) -> None:
+        """Remove the entry of the key or all entries if no key is given."""
+
+        if key is None:
+            cls._entries.clear()
+        else:
+            cls._entries.pop(key, None)
+
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "entries": len(cls._entries),
+        }
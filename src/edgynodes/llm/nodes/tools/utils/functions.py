@@ -3,10 +3,12 @@ from typing import Any
 import fastmcp
 import llmir
 
+from .sessions import MCPSession, MCPSessionManager, MCPTarget
+
 class MCPToolFunction:
 
     tool: llmir.AITool
-    client: fastmcp.Client[Any]
+    session: MCPSession
     timeout: timedelta | float | int | None
     progress_handler: fastmcp.client.client.ProgressHandler | None
     raise_on_error: bool
@@ -14,14 +16,14 @@ class MCPToolFunction:
 
     def __init__(self, 
                  tool: llmir.AITool, 
-                 client: fastmcp.Client[Any], 
+                 client: MCPTarget | MCPSession, 
                  timeout: timedelta | float | int | None = None,
                  progress_handler: fastmcp.client.client.ProgressHandler | None = None,
                  raise_on_error: bool = True,
                  meta: dict[str, Any] | None = None,
         ) -> None:
         self.tool = tool
-        self.client = client
+        self.session = client if isinstance(client, MCPSession) else MCPSessionManager.get(client)
         self.timeout = timeout
         self.progress_handler = progress_handler
         self.raise_on_error = raise_on_error
@@ -29,11 +31,16 @@ class MCPToolFunction:
 
 
 
+    @property
+    def client(self) -> fastmcp.Client[Any]:
+        return self.session.client
+
+
     async def __call__(self, **kwargs: Any) -> fastmcp.client.client.CallToolResult:
         
-        async with self.client:
+        async with self.session.connect() as client:
 
-            return await self.client.call_tool(
+            return await client.call_tool(
                 self.tool.name, 
                 kwargs, 
                 timeout=self.timeout, 
@@ -0,0 +1,119 @@
+from typing import Any, Callable, cast
+from pydantic import Field, create_model, BaseModel
+from docstring_parser import parse
+import inspect
+import weakref
+import llmir
+
+from .context import ToolContext
+
+
+class ToolSignature:
+    """The precomputed signature of a tool function.
+
+    Attributes:
+        signature: The signature of the function.
+        context_params: The names of the parameters that receive a `ToolContext`.
+    """
+
+    signature: inspect.Signature
+    context_params: tuple[str, ...]
+
+    def __init__(self, function: Callable[..., Any]) -> None:
+
+        self.signature = inspect.signature(function)
+        self.context_params = tuple(
+            name for name, param in self.signature.parameters.items() if ToolContext.is_context_param(param)
+        )
+
+
+
+class ToolRegistry:
+    """Process-wide memoization of tool signatures and tool schemas.
+
+    Parsing the docstring and generating the JSON schema of a function is done only once per function,
+    no matter how often a graph with the function is built.
+    The entries are weakly referenced and removed together with the function.
+    """
+
+    _signatures: weakref.WeakKeyDictionary[Callable[..., Any], ToolSignature] = weakref.WeakKeyDictionary()
+    _tools: weakref.WeakKeyDictionary[Callable[..., Any], llmir.AITool] = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def signature(cls, function: Callable[..., Any]) -> ToolSignature:
+
+        try:
+            return cls._signatures[function]
+        except (KeyError, TypeError): # TypeError: not weakly referenceable
+            pass
+
+        signature = ToolSignature(function)
+
+        try:
+            cls._signatures[function] = signature
+        except TypeError:
+            pass
+
+        return signature
+
+
+    @classmethod
+    def tool(cls, function: Callable[..., Any]) -> llmir.AITool:
+
+        try:
+            return cls._tools[function]
+        except (KeyError, TypeError):
+            pass
+
+        tool = cls.format_function(function)
+
+        try:
+            cls._tools[function] = tool
+        except TypeError:
+            pass
+
+        return tool
+
+
+    @classmethod
+    def format_function(cls, function: Callable[..., Any]) -> llmir.AITool:
+
+        doc = parse(function.__doc__ or "")
+        param_descriptions = {p.arg_name: p.description for p in doc.params}
+
+        signature = cls.signature(function)
+        fields = {}
+
+        for name, param in signature.signature.parameters.items():
+
+            # Skip *args or **kwargs and context parameters
+            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD) or name in signature.context_params:
+                continue
+
+            annotation = param.annotation if param.annotation is not inspect.Parameter.empty else Any
+            default = ... if param.default is inspect.Parameter.empty else param.default
+
+            fields[name] = (
+                annotation,
+                Field(
+                    default=default,
+                    description=param_descriptions.get(name, "")
+                )
+            )
+
+        dynamic_model: type[BaseModel] = create_model(function.__name__, **cast(dict[str, Any], fields))
+
+        return llmir.AITool(
+            name=function.__name__,
+            description=doc.description or "",
+            input_schema=dynamic_model.model_json_schema(),
+        )
+
+
+
+def tool[F: Callable[..., Any]](function: F) -> F:
+    """Decorator to build the tool schema of a function at definition time instead of on first usage."""
+
+    ToolRegistry.tool(function)
+
+    return function
@@ -0,0 +1,262 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Hashable
+from rich import print as rprint
+from fastmcp.client.transports import ClientTransport, infer_transport
+import asyncio
+import hashlib
+import time
+import fastmcp
+import mcp
+
+from .catalog import MCPToolCatalog
+
+
+MCPTarget = str | ClientTransport
+
+
+class MCPSession:
+    """A long-lived connection to one MCP server that is shared across graph runs.
+
+    The session owns its `fastmcp.Client`, which is entered once and kept open, so tool calls do not pay for a new connection and MCP handshake.
+    Concurrent usage is bounded by a semaphore; all calls are multiplexed over the same session.
+
+    The session creates its client from a URL or transport and the `client_options`.
+    A ready-made `fastmcp.Client` is rejected, because its handlers and options can not be applied to the session client.
+
+    The cached tool list of the server in the `MCPToolCatalog` is keyed by the server identity `key`.
+    It is invalidated on reconnects and `tools/list_changed` notifications.
+
+    Attributes:
+        key: The identity of the server, see `server_key`.
+        client: The MCP client that owns the session.
+        max_concurrent_calls: The maximum number of concurrent requests on the session.
+        health_check_interval: The idle time in seconds after which the session is pinged before it is used again.
+        max_retries: The number of reconnect attempts before an error is raised.
+        backoff: The initial delay in seconds between reconnect attempts. It is doubled after each attempt.
+        max_backoff: The maximum delay in seconds between reconnect attempts.
+    """
+
+    key: Hashable
+    client: fastmcp.Client[Any]
+    max_concurrent_calls: int
+    health_check_interval: float
+    max_retries: int
+    backoff: float
+    max_backoff: float
+
+    def __init__(self,
+                 target: MCPTarget,
+                 client_options: dict[str, Any] | None = None,
+                 max_concurrent_calls: int = 8,
+                 health_check_interval: float = 30.0,
+                 max_retries: int = 3,
+                 backoff: float = 0.5,
+                 max_backoff: float = 8.0,
+        ) -> None:
+        options = dict(client_options or {})
+        self._message_handler = options.pop("message_handler", None)
+
+        self.key = self.server_key(target, client_options)
+        self.client = fastmcp.Client(self.transport(target), message_handler=self.handle_message, **options)
+        self.max_concurrent_calls = max_concurrent_calls
+        self.health_check_interval = health_check_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._semaphore = asyncio.Semaphore(max_concurrent_calls)
+        self._lock = asyncio.Lock()
+        self._entered = False
+        self._last_used = 0.0
+
+
+    @classmethod
+    def transport(cls, target: MCPTarget) -> ClientTransport:
+
+        if isinstance(target, fastmcp.Client):
+            raise ValueError(
+                "MCP sessions create their own client, so the handlers and options of a given client would be lost. "
+                "Pass the URL or transport of the server and the client settings as `client_options`, "
+                "e.g. `client_options={\"log_handler\": log_handler}`."
+            )
+
+        return infer_transport(target)
+
+
+    @classmethod
+    def server_key(cls, target: MCPTarget, client_options: dict[str, Any] | None = None) -> Hashable:
+        """Get the identity of the server: the transport type, its address and the client options.
+
+        Transports that are created for every message but point to the same server get the same key.
+        """
+
+        transport = cls.transport(target)
+
+        identity: list[Hashable] = [type(transport).__name__]
+
+        for name in ("url", "headers", "command", "args", "env", "cwd"):
+            if (value := getattr(transport, name, None)) is not None:
+                identity.append((name, repr(value)))
+
+        if (server := getattr(transport, "server", None)) is not None: # In-memory servers
+            identity.append(("server", id(server)))
+
+        if (auth := getattr(transport, "auth", None)) is not None:
+            token = getattr(auth, "token", None)
+            token = token.get_secret_value() if hasattr(token, "get_secret_value") else token # type: ignore
+            identity.append(("auth", type(auth).__name__, hashlib.sha256(repr(token).encode()).hexdigest() if token is not None else None))
+
+        if len(identity) == 1: # Unknown transport, only the instance identifies the server
+            identity.append(("transport", id(transport)))
+
+        if client_options:
+            identity.append(("options", repr(sorted(client_options.items()))))
+
+        return tuple(identity)
+
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[fastmcp.Client[Any]]:
+        """Borrow the warm client for one or more requests.
+
+        Connects or reconnects if necessary.
+        If the session broke during usage, it is reconnected on the next usage.
+        """
+
+        async with self._semaphore:
+
+            await self.ensure_connected()
+
+            try:
+                yield self.client
+            finally:
+                self._last_used = time.monotonic()
+
+
+    async def ensure_connected(self) -> None:
+
+        async with self._lock:
+
+            if self._entered and self.client.is_connected():
+
+                if time.monotonic() - self._last_used < self.health_check_interval:
+                    return
+
+                if await self.is_healthy():
+                    return
+
+                rprint(f"MCP session {self.client.name} is unhealthy, reconnecting")
+
+            await self._reconnect()
+
+
+    async def is_healthy(self) -> bool:
+
+        try:
+            return await self.client.ping()
+        except Exception:
+            return False
+
+
+    async def close(self) -> None:
+
+        async with self._lock:
+            await self._disconnect()
+
+
+    async def handle_message(self, message: Any) -> None:
+        """Invalidate the tool list on `tools/list_changed` notifications and forward the message to the handler of the client options."""
+
+        if isinstance(message, mcp.types.ServerNotification) and isinstance(message.root, mcp.types.ToolListChangedNotification):
+            MCPToolCatalog.invalidate(self.key)
+
+        if self._message_handler is not None:
+            await self._message_handler(message)
+
+
+    async def _reconnect(self) -> None:
+
+        await self._disconnect()
+
+        MCPToolCatalog.invalidate(self.key)
+
+        delay = self.backoff
+
+        for attempt in range(self.max_retries + 1):
+
+            try:
+                await self.client.__aenter__()
+                self._entered = True
+                self._last_used = time.monotonic()
+                return
+
+            except Exception as e:
+                if attempt == self.max_retries:
+                    e.add_note(f"Unable to connect to MCP server after {attempt + 1} attempts")
+                    raise e
+
+                rprint(f"Connecting to MCP server failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+
+    async def _disconnect(self) -> None:
+
+        if not self._entered:
+            return
+
+        self._entered = False
+
+        try:
+            await self.client.close()
+        except Exception as e:
+            rprint(f"Error closing MCP session {self.client.name}: {e}")
+
+
+
+class MCPSessionManager:
+    """Process-wide registry of persistent MCP sessions.
+
+    Sessions are keyed by the server identity (`MCPSession.server_key`): the transport address and the client options.
+    Passing the same URL, or a new transport for the same server, in every graph run reuses the warm session,
+    so no connection is opened per run.
+    Call `shutdown` on application exit to close all sessions.
+    """
+
+    _sessions: dict[Hashable, MCPSession] = {}
+
+    @classmethod
+    def get(cls, target: MCPTarget, client_options: dict[str, Any] | None = None, **kwargs: Any) -> MCPSession:
+        """Get the session for the server of the target or create it.
+
+        Args:
+            target: The URL or the transport of the MCP server.
+            client_options: Keyword arguments for the `fastmcp.Client` of a new session, e.g. `log_handler` or `timeout`.
+                They are part of the server identity, so they should be the same in every run.
+            **kwargs: Options for a newly created `MCPSession`. Ignored if the session exists.
+        """
+
+        key = MCPSession.server_key(target, client_options)
+
+        if key not in cls._sessions:
+            cls._sessions[key] = MCPSession(target, client_options, **kwargs)
+
+        return cls._sessions[key]
+
+
+    @classmethod
+    async def release(cls, target: MCPTarget, client_options: dict[str, Any] | None = None) -> None:
+        """Close and forget the session of the server of the target."""
+
+        if (session := cls._sessions.pop(MCPSession.server_key(target, client_options), None)) is not None:
+            await session.close()
+
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Close all sessions."""
+
+        sessions = list(cls._sessions.values())
+        cls._sessions.clear()
+
+        await asyncio.gather(*(session.close() for session in sessions))
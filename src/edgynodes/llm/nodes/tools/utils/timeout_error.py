@@ -0,0 +1,13 @@
+class ToolCallTimeoutError(TimeoutError):
+    """A tool call exceeded the timeout of the node that executed it.
+
+    Attributes:
+        timeout: The timeout in seconds.
+    """
+
+    timeout: float
+
+    def __init__(self, name: str, timeout: float) -> None:
+        super().__init__(f"The function {name} timed out after {timeout} seconds")
+
+        self.timeout = timeout